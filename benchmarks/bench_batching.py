@@ -0,0 +1,79 @@
+"""Бенчмарк пропускной способности пакетной генерации сводок на CPU.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_batching.py --batch-sizes 1 2 4 8 --max-new-tokens 128
+"""
+import argparse
+import sqlite3
+import time
+
+import torch
+from transformers import GPT2Tokenizer, T5ForConditionalGeneration
+
+MODEL_NAME = 'RussianNLP/FRED-T5-Summarizer'
+
+
+def load_prompts(db_path: str, count: int) -> list:
+    """Строит промпты из последних новостей bee.db (по 7 новостей на промпт)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT title, content, channel FROM news ORDER BY pub_date DESC LIMIT ?",
+            (count * 7,)
+        ).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        rows = [(f"Новость {i}", "Банк России сохранил ключевую ставку. " * 20, "cb_economics") for i in range(count * 7)]
+    prompts = []
+    for i in range(count):
+        chunk = rows[(i * 7) % len(rows):][:7] or rows[:7]
+        prompt = "Суммаризируй следующие экономические новости"
+        for title, content, source in chunk:
+            prompt += f"Заголовок: {title}\nИсточник: {source}\nТекст: {content[:500]}\n\n"
+        prompts.append(prompt)
+    return prompts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="database/bee.db")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--prompts", type=int, default=8, help="число промптов на каждый размер пакета")
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    parser.add_argument("--num-beams", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=0, help="потоки torch (0 — по умолчанию)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    tokenizer = GPT2Tokenizer.from_pretrained(MODEL_NAME, eos_token='</s>')
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    model = T5ForConditionalGeneration.from_pretrained(MODEL_NAME).to('cpu').eval()
+    prompts = load_prompts(args.db, args.prompts)
+
+    print(f"{'batch':>5} {'prompts/s':>10} {'s/prompt':>9} {'total, s':>9}")
+    for batch_size in args.batch_sizes:
+        torch.manual_seed(0)
+        started = time.perf_counter()
+        for i in range(0, len(prompts), batch_size):
+            inputs = tokenizer(prompts[i:i + batch_size], return_tensors="pt", padding=True)
+            with torch.no_grad():
+                model.generate(
+                    inputs["input_ids"],
+                    attention_mask=inputs["attention_mask"],
+                    max_new_tokens=args.max_new_tokens,
+                    min_new_tokens=min(50, args.max_new_tokens),
+                    num_beams=args.num_beams,
+                    early_stopping=True,
+                    no_repeat_ngram_size=4,
+                    top_p=0.9,
+                    do_sample=True
+                )
+        elapsed = time.perf_counter() - started
+        print(f"{batch_size:>5} {len(prompts) / elapsed:>10.3f} {elapsed / len(prompts):>9.2f} {elapsed:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
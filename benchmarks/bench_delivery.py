@@ -0,0 +1,73 @@
+"""Проверка очереди доставки против локального фиктивного Bot API.
+
+Отправляет по --messages сообщений в --chats чатов (половина — группы) через DeliveryQueue
+и сообщает время доставки, число ответов 429/502 со стороны сервера и потерянные сообщения.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_delivery.py --chats 100 --messages 2 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from aiohttp import web
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bot')))
+from delivery import DeliveryQueue
+from fake_bot_api import FakeBotApi
+
+
+async def run(args) -> None:
+    api = FakeBotApi(error_rate=args.error_rate)
+    runner = web.AppRunner(api.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    bot = Bot("123:fake", base_url=f"http://127.0.0.1:{port}/bot",
+              request=HTTPXRequest(connection_pool_size=args.workers + 2))
+    queue = DeliveryQueue(bot, workers=args.workers, backoff=0.2)
+    chats = [(-1 if i % 2 else 1) * (1000 + i) for i in range(args.chats)]
+    long_text = "Экономическая сводка. " * 300  # больше 4096 символов: делится на части
+
+    async def deliver(chat_id: int, index: int) -> bool:
+        try:
+            await queue.send(chat_id, long_text if index == 0 and args.long else f"Сводка {index} для {chat_id}")
+            return True
+        except Exception as e:
+            print(f"Чат {chat_id}: {e}")
+            return False
+
+    async with bot:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(deliver(chat_id, index)
+                                         for index in range(args.messages) for chat_id in chats))
+        elapsed = time.perf_counter() - started
+        await queue.stop()
+    await runner.cleanup()
+
+    sent = len(results)
+    delivered = sum(results)
+    print(f"Сообщений: {sent}, доставлено: {delivered}, потеряно: {sent - delivered}")
+    print(f"Время: {elapsed:.1f} с, {api.stats['delivered'] / elapsed:.1f} запросов sendMessage/с")
+    print(f"Ответов 429: {api.stats['error_429']}, 502: {api.stats['error_502']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--long", action="store_true", help="первое сообщение длиннее 4096 символов")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
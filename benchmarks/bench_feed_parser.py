@@ -0,0 +1,228 @@
+"""Бенчмарк разбора RSS и записи новостей сборщиком до и после потокового парсера.
+
+Старый путь: feedparser.parse, дата перебором трех форматов strptime, по одному
+INSERT на новость и SimHash с циклом по битам на Python. Новый путь: потоковый
+разбор database/rss_parser.py, кэш дат, один executemany на канал
+(MultiChannelNewsCollector._save_entries) и SimHash на numpy. Ленты берутся
+из записанных файлов (--fixtures, по файлу <канал>.xml, например
+curl 'https://tg.i-c-a.su/rss/bankglav?limit=100' > fixtures/bankglav.xml) или,
+по умолчанию, собираются в формате tg.i-c-a.su из новостей bee.db. Выводит записей
+в секунду для разбора, записи в базу и всего цикла, а также число записей, которые
+пути разобрали по-разному.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_feed_parser.py --repeats 20
+"""
+import argparse
+import glob
+import hashlib
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from email.utils import format_datetime
+from xml.sax.saxutils import escape, quoteattr
+
+import feedparser
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+OLD_DATE_FORMATS = ['%a, %d %b %Y %H:%M:%S %Z', '%Y-%m-%dT%H:%M:%SZ', '%a, %d %b %Y %H:%M:%S %z']
+
+
+def render_fixture(channel: str, rows: list) -> bytes:
+    """Лента в формате tg.i-c-a.su; rows — [(заголовок, ссылка, текст, pub_date, просмотры)]."""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss xmlns:media="http://search.yahoo.com/mrss/" version="2.0"><channel>',
+        f"<title>{escape(channel)}</title><link>https://t.me/{escape(channel)}</link>",
+    ]
+    for title, link, content, pub_date, views in rows:
+        description = content.replace("\n", "<br />").replace("]]>", "]]]]><![CDATA[>")
+        parts.append(
+            f"<item><title>{escape(title)}</title><link>{escape(link)}</link><guid>{escape(link)}</guid>"
+            f"<pubDate>{format_datetime(datetime.fromisoformat(pub_date))}</pubDate>"
+            f"<description><![CDATA[{description}]]></description>"
+            f"<media:statistics views={quoteattr(str(views))}/></item>"
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts).encode()
+
+
+def load_fixtures(args) -> dict:
+    """Возвращает {канал: тело ленты}."""
+    if args.fixtures:
+        return {
+            os.path.splitext(os.path.basename(path))[0]: open(path, "rb").read()
+            for path in sorted(glob.glob(os.path.join(args.fixtures, "*.xml")))
+        }
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        channels = [row[0] for row in conn.execute("SELECT DISTINCT channel FROM news ORDER BY channel")]
+        return {
+            channel: render_fixture(channel, conn.execute(
+                "SELECT title, link, content, pub_date, views FROM news WHERE channel = ? "
+                "ORDER BY pub_date DESC LIMIT 100", (channel,)
+            ).fetchall())
+            for channel in channels
+        }
+    finally:
+        conn.close()
+
+
+def old_parse_datetime(date_str: str) -> str:
+    for fmt in OLD_DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).isoformat()
+        except ValueError:
+            continue
+    return datetime.now().isoformat()
+
+
+def old_simhash(text: str) -> int:
+    from database.dedup import _WORD_RE, SHINGLE_SIZE, SIMHASH_BITS
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+@contextmanager
+def old_dedup():
+    """Подменяет SimHash в assign_cluster прежней реализацией."""
+    from database import dedup
+    current = dedup.simhash
+    dedup.simhash = old_simhash
+    try:
+        yield
+    finally:
+        dedup.simhash = current
+
+
+def old_save(conn: sqlite3.Connection, channel: str, entries) -> int:
+    """Запись, как в сборщике до потокового парсера: INSERT и кластеризация на каждую новость."""
+    from database.dedup import assign_cluster
+    inserted = 0
+    with conn, old_dedup():
+        for item in entries:
+            pub_date = old_parse_datetime(item.published)
+            content = clean_content(item.description)
+            views = int(item.media_statistics.get('views', 0)) if hasattr(item, 'media_statistics') else 0
+            cursor = conn.execute('''INSERT OR IGNORE INTO news
+                              (channel, title, link, content, pub_date, views)
+                              VALUES (?, ?, ?, ?, ?, ?)''',
+                                  (channel, item.title, item.link, content, pub_date, views))
+            if cursor.rowcount == 1:
+                assign_cluster(conn, cursor.lastrowid, content, pub_date)
+                inserted += 1
+        conn.execute('''INSERT OR REPLACE INTO channel_state
+                     (channel, last_link, last_pub_date, updated_at) VALUES (?, ?, ?, ?)''',
+                     (channel, None, None, datetime.now().isoformat()))
+    return inserted
+
+
+def clean_content(text: str) -> str:
+    return text.replace('<br/>', '\n').replace('<br />', '\n').replace(' ', ' ').strip()
+
+
+def reset(conn: sqlite3.Connection) -> None:
+    with conn:
+        for table in ("news", "news_simhash_bands", "channel_state"):
+            conn.execute(f"DELETE FROM {table}")
+
+
+def normalized(item, views: int) -> tuple:
+    return item.title, item.link, clean_content(item.description), old_parse_datetime(item.published), views
+
+
+def count_mismatches(old_entries: list, new_entries: list) -> int:
+    old = [normalized(item, int(item.get('media_statistics', {}).get('views', 0))) for item in old_entries]
+    new = [normalized(item, item.views) for item in new_entries]
+    return abs(len(old) - len(new)) + sum(a != b for a, b in zip(old, new))
+
+
+def measure(func, repeats: int, before=None) -> list:
+    timings = []
+    for _ in range(repeats):
+        if before:
+            before()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(name: str, items: int, timings: list) -> None:
+    median = statistics.median(timings)
+    print(f"{name:<22} {items / median:12.0f} записей/с   медиана {median * 1000:8.2f} мс")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="каталог с записанными лентами <канал>.xml")
+    parser.add_argument("--db", default="database/bee.db", help="база для сборки лент, если --fixtures не задан")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    feeds = load_fixtures(args)
+    # Сборщик берет путь к базе из окружения при импорте
+    os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bee-feed-"), "bee.db")
+    from database.creator import MultiChannelNewsCollector, parse_feed_body
+    from database.rss_parser import parse_pub_date
+
+    old_entries = {channel: feedparser.parse(body).entries for channel, body in feeds.items()}
+    new_entries = {channel: parse_feed_body(body) for channel, body in feeds.items()}
+    items = sum(len(entries) for entries in new_entries.values())
+    size = sum(len(body) for body in feeds.values())
+    mismatches = sum(count_mismatches(old_entries[channel], new_entries[channel]) for channel in feeds)
+    print(f"Лент: {len(feeds)}, записей: {items}, объем {size / 1024:.0f} КиБ, расхождений разбора: {mismatches}")
+
+    collector = MultiChannelNewsCollector(list(feeds))
+    # Старый путь пишет через одно соединение на весь цикл, новый берет его на каждую ленту
+    with collector._db.connection() as conn:
+        def old_parse():
+            for body in feeds.values():
+                feedparser.parse(body)
+
+        def new_parse():
+            for body in feeds.values():
+                parse_feed_body(body)
+
+        def old_store():
+            for channel, entries in old_entries.items():
+                old_save(conn, channel, entries)
+
+        def new_store():
+            for channel, entries in new_entries.items():
+                collector._with_connection(collector._save_entries, channel, entries)
+
+        def old_cycle():
+            for channel, body in feeds.items():
+                old_save(conn, channel, feedparser.parse(body).entries)
+
+        def new_cycle():
+            # Кэш дат очищается: в цикле сбора ленты свежие
+            parse_pub_date.cache_clear()
+            for channel, body in feeds.items():
+                collector._with_connection(collector._save_entries, channel, parse_feed_body(body))
+
+        report("разбор: feedparser", items, measure(old_parse, args.repeats))
+        report("разбор: потоковый", items, measure(new_parse, args.repeats))
+        report("запись: по строке", items, measure(old_store, args.repeats, lambda: reset(conn)))
+        report("запись: executemany", items, measure(new_store, args.repeats, lambda: reset(conn)))
+        report("цикл: старый", items, measure(old_cycle, args.repeats, lambda: reset(conn)))
+        report("цикл: новый", items, measure(new_cycle, args.repeats, lambda: reset(conn)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Бенчмарк выборки свежих новостей до и после миграции схемы.
+
+Создает временную базу, заполняет news синтетическими строками и сравнивает
+старый запрос (NOT IN + загрузка processed_news в множество, без индексов)
+с новым (анти-соединение по индексу pub_date).
+
+Запуск из корня репозитория:
+    python benchmarks/bench_news_query.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from database.creator import CHANNELS
+from database.migrations import MIGRATIONS, apply_migrations
+
+OLD_QUERY = """
+    SELECT id, title, content, channel
+    FROM news
+    WHERE pub_date >= ? AND id NOT IN (SELECT news_id FROM processed_news)
+    ORDER BY pub_date DESC
+    LIMIT 7
+"""
+
+NEW_QUERY = """
+    SELECT n.id, n.title, n.content, n.channel
+    FROM news AS n
+    LEFT JOIN processed_news AS p ON p.news_id = n.id
+    WHERE n.pub_date >= ? AND p.news_id IS NULL
+    ORDER BY n.pub_date DESC
+    LIMIT 7
+"""
+
+
+def seed(conn: sqlite3.Connection, rows: int, processed_share: float) -> None:
+    """Заполняет news строками за последние 30 дней и помечает часть как обработанные."""
+    # Только базовые таблицы, без индексов: так выглядела схема до миграции
+    for statement in MIGRATIONS[0][2]:
+        conn.execute(statement)
+    conn.execute("PRAGMA user_version = 1")
+    now = datetime.now()
+    rng = random.Random(0)
+    batch = []
+    for i in range(rows):
+        pub_date = (now - timedelta(seconds=rng.randint(0, 30 * 24 * 3600))).isoformat(timespec="seconds")
+        batch.append((rng.choice(CHANNELS), f"Заголовок {i}", f"https://t.me/x/{i}", "Текст новости " * 20, pub_date, 0))
+        if len(batch) == 50000:
+            conn.executemany(
+                "INSERT INTO news (channel, title, link, content, pub_date, views) VALUES (?, ?, ?, ?, ?, ?)", batch
+            )
+            batch.clear()
+    if batch:
+        conn.executemany(
+            "INSERT INTO news (channel, title, link, content, pub_date, views) VALUES (?, ?, ?, ?, ?, ?)", batch
+        )
+    # Обработанными считаем самые свежие новости: так их приходится пропускать при выборке
+    conn.execute(
+        "INSERT INTO processed_news (news_id) SELECT id FROM news ORDER BY pub_date DESC LIMIT ?",
+        (int(rows * processed_share),)
+    )
+    conn.commit()
+
+
+def measure(func, repeats: int) -> list:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(name: str, timings: list) -> None:
+    print(f"{name:<8} медиана {statistics.median(timings):9.2f} мс   "
+          f"мин {min(timings):9.2f} мс   макс {max(timings):9.2f} мс")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--processed-share", type=float, default=0.01, help="доля обработанных новостей")
+    parser.add_argument("--window-hours", type=float, default=24, help="окно выборки в часах")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        started = time.perf_counter()
+        seed(conn, args.rows, args.processed_share)
+        print(f"Заполнено {args.rows} строк за {time.perf_counter() - started:.1f} с")
+        since = (datetime.now() - timedelta(hours=args.window_hours)).isoformat(timespec="seconds")
+
+        def old_path():
+            processed_ids = {row[0] for row in conn.execute("SELECT news_id FROM processed_news")}
+            rows = conn.execute(OLD_QUERY, (since,)).fetchall()
+            return [row for row in rows if row[0] not in processed_ids]
+
+        def new_path():
+            return conn.execute(NEW_QUERY, (since,)).fetchall()
+
+        before = measure(old_path, args.repeats)
+        apply_migrations(conn)
+        after = measure(new_path, args.repeats)
+        assert old_path() == new_path()
+        report("до", before)
+        report("после", after)
+        print("План нового запроса:")
+        for row in conn.execute("EXPLAIN QUERY PLAN " + NEW_QUERY, (since,)):
+            print("   ", row[-1])
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
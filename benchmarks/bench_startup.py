@@ -0,0 +1,72 @@
+"""Бенчмарк времени запуска: импорт модуля бота и загрузка модели.
+
+Каждое измерение выполняется в отдельном процессе, чтобы не учитывать
+прогретые в памяти модули. Сравниваются загрузка весов из кэша Hugging Face
+и из подготовленной копии в safetensors (MODEL_CACHE_DIR).
+
+Запуск из корня репозитория:
+    python benchmarks/bench_startup.py --repeats 3
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+IMPORT_BOT = "import sys; sys.path.insert(0, 'bot'); import bot"
+
+LOAD_MODEL = """
+import sys, time
+sys.path.insert(0, 'bot')
+started = time.perf_counter()
+from backends import TorchBackend
+TorchBackend(cache_dir={cache_dir!r}).load()
+print(time.perf_counter() - started)
+"""
+
+
+def run(code: str, env: dict = None) -> float:
+    """Выполняет код в новом процессе и возвращает время его работы (или напечатанное им время)."""
+    import time
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, **(env or {})}
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    output = result.stdout.strip().splitlines()
+    try:
+        return float(output[-1])
+    except (IndexError, ValueError):
+        return elapsed
+
+
+def report(name: str, timings: list) -> None:
+    print(f"{name:<40} медиана {statistics.median(timings):7.2f} с   мин {min(timings):7.2f} с")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    # Импорт бота не должен загружать модель; BOT_TOKEN не нужен, main() не вызывается
+    report("импорт bot/bot.py", [run(IMPORT_BOT) for _ in range(args.repeats)])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report("загрузка модели из кэша Hugging Face",
+               [run(LOAD_MODEL.format(cache_dir="")) for _ in range(args.repeats)])
+        cache_dir = os.path.join(tmp, "safetensors")
+        # Первый запуск готовит копию в safetensors и в замер не входит
+        run(LOAD_MODEL.format(cache_dir=cache_dir))
+        report("загрузка модели из копии safetensors",
+               [run(LOAD_MODEL.format(cache_dir=cache_dir)) for _ in range(args.repeats)])
+
+
+if __name__ == '__main__':
+    main()
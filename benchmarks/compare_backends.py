@@ -0,0 +1,124 @@
+"""Сравнение бэкендов инференса по задержке и качеству на фиксированном корпусе из bee.db.
+
+Корпус строится детерминированно (новости по возрастанию id, по 7 на промпт).
+Качество оценивается по ROUGE-1 и ROUGE-L относительно эталонного бэкенда
+(по умолчанию torch); генерация без сэмплирования, чтобы результаты были воспроизводимы.
+
+Запуск из корня репозитория:
+    python benchmarks/compare_backends.py --backends torch torch-int8 onnx --prompts 5
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bot')))
+from backends import BACKENDS, create_backend
+
+
+def load_corpus(db_path: str, prompts: int, items_per_prompt: int = 7) -> list:
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT title, content, channel FROM news ORDER BY id LIMIT ?",
+            (prompts * items_per_prompt,)
+        ).fetchall()
+    finally:
+        conn.close()
+    corpus = []
+    for i in range(0, len(rows), items_per_prompt):
+        prompt = "Суммаризируй следующие экономические новости"
+        for title, content, source in rows[i:i + items_per_prompt]:
+            prompt += f"Заголовок: {title}\nИсточник: {source}\nТекст: {content[:500]}\n\n"
+        corpus.append(prompt)
+    return corpus
+
+
+def rouge_1(reference: str, candidate: str) -> float:
+    ref, cand = reference.lower().split(), candidate.lower().split()
+    if not ref or not cand:
+        return 0.0
+    ref_counts = {}
+    for token in ref:
+        ref_counts[token] = ref_counts.get(token, 0) + 1
+    overlap = 0
+    for token in cand:
+        if ref_counts.get(token, 0) > 0:
+            ref_counts[token] -= 1
+            overlap += 1
+    if overlap == 0:
+        return 0.0
+    precision, recall = overlap / len(cand), overlap / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_l(reference: str, candidate: str) -> float:
+    ref, cand = reference.lower().split(), candidate.lower().split()
+    if not ref or not cand:
+        return 0.0
+    previous = [0] * (len(cand) + 1)
+    for ref_token in ref:
+        current = [0]
+        for j, cand_token in enumerate(cand):
+            current.append(previous[j] + 1 if ref_token == cand_token else max(previous[j + 1], current[j]))
+        previous = current
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision, recall = lcs / len(cand), lcs / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="database/bee.db")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--reference", default="torch", choices=list(BACKENDS))
+    parser.add_argument("--prompts", type=int, default=5)
+    parser.add_argument("--max-new-tokens", type=int, default=200)
+    parser.add_argument("--num-beams", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.db, args.prompts)
+    if not corpus:
+        print(f"В {args.db} нет новостей для корпуса")
+        return
+    params = {
+        "max_new_tokens": args.max_new_tokens,
+        "min_new_tokens": min(50, args.max_new_tokens),
+        "num_beams": args.num_beams,
+        "early_stopping": True,
+        "no_repeat_ngram_size": 4,
+        "do_sample": False,
+    }
+
+    names = [args.reference] + [name for name in args.backends if name != args.reference]
+    outputs = {}
+    print(f"{'бэкенд':<12} {'загрузка, с':>12} {'медиана, с':>11} {'p90, с':>8} {'ROUGE-1':>8} {'ROUGE-L':>8}")
+    for name in names:
+        backend = create_backend(name)
+        started = time.perf_counter()
+        try:
+            backend.load()
+        except RuntimeError as e:
+            print(f"{name:<12} пропущен: {e}")
+            continue
+        load_time = time.perf_counter() - started
+        latencies, outputs[name] = [], []
+        for prompt in corpus:
+            started = time.perf_counter()
+            outputs[name].append(backend.generate([prompt], **params)[0])
+            latencies.append(time.perf_counter() - started)
+        reference = outputs.get(args.reference, outputs[name])
+        r1 = statistics.mean(rouge_1(ref, out) for ref, out in zip(reference, outputs[name]))
+        rl = statistics.mean(rouge_l(ref, out) for ref, out in zip(reference, outputs[name]))
+        p90 = sorted(latencies)[int(0.9 * (len(latencies) - 1))]
+        print(f"{name:<12} {load_time:>12.1f} {statistics.median(latencies):>11.2f} {p90:>8.2f} {r1:>8.3f} {rl:>8.3f}")
+        del backend
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""Сквозная проверка режима webhook с несколькими процессами бота и фиктивным Bot API.
+
+Запускает фиктивные Bot API и RSS (benchmarks/fake_rss.py), затем бота в режиме webhook
+(--workers процессов на одном порту) с отдельной временной базой. Отправляет обновления на webhook: /start, выбор
+своей периодичности кнопкой и ввод числа минут (следующее сообщение может обработать
+другой процесс). Затем ждет сводку по расписанию. В группе проверяет, что после
+обновления chat_member о снятии прав администратора команды отклоняют все процессы, а
+не только получивший обновление. Проверяет, что ведущий процесс ровно один.
+
+Запуск из корня репозитория:
+    python benchmarks/e2e_webhook.py --workers 2
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import aiohttp
+from aiohttp import web
+
+from fake_bot_api import ADMIN_RIGHTS, FakeBotApi
+from fake_rss import FakeRss
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CHAT_ID = 100
+GROUP_CHAT = {"id": -200, "type": "supergroup", "title": "E2E"}
+ADMIN = {"id": 300, "is_bot": False, "first_name": "Admin"}
+SECRET = "e2e-secret"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed_database(db_path: str) -> None:
+    """Создает базу со схемой бота и несколькими свежими новостями."""
+    sys.path.insert(0, ROOT)
+    from database.migrations import apply_migrations
+    conn = sqlite3.connect(db_path)
+    try:
+        apply_migrations(conn)
+        now = datetime.now()
+        with conn:
+            conn.executemany(
+                "INSERT INTO news (channel, title, link, content, pub_date, views) VALUES (?, ?, ?, ?, ?, 0)",
+                [("cb_economics", f"Новость {i}", f"https://example.org/{i}",
+                  f"Банк России сообщил о событии номер {i}.", (now - timedelta(minutes=i)).isoformat())
+                 for i in range(5)]
+            )
+    finally:
+        conn.close()
+
+
+def message_update(update_id: int, text: str, chat: dict = None, user: dict = None) -> dict:
+    update = {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": int(time.time()), "text": text,
+            "chat": chat or {"id": CHAT_ID, "type": "private"},
+            "from": user or {"id": CHAT_ID, "is_bot": False, "first_name": "E2E"},
+        },
+    }
+    if text.startswith("/"):
+        update["message"]["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return update
+
+
+def callback_update(update_id: int, data: str) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id), "chat_instance": "e2e", "data": data,
+            "from": {"id": CHAT_ID, "is_bot": False, "first_name": "E2E"},
+            "message": {"message_id": update_id, "date": int(time.time()), "text": "Выберите периодичность",
+                        "chat": {"id": CHAT_ID, "type": "private"}},
+        },
+    }
+
+
+def demotion_update(update_id: int) -> dict:
+    """Обновление chat_member: администратор ADMIN стал обычным участником группы."""
+    return {
+        "update_id": update_id,
+        "chat_member": {
+            "chat": GROUP_CHAT, "from": ADMIN, "date": int(time.time()),
+            "old_chat_member": {"status": "administrator", "user": ADMIN, **ADMIN_RIGHTS},
+            "new_chat_member": {"status": "member", "user": ADMIN},
+        },
+    }
+
+
+async def wait_for(predicate, timeout: float, what: str) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Не дождались: {what}")
+        await asyncio.sleep(0.2)
+
+
+async def run(args) -> None:
+    api = FakeBotApi(strict=False)
+    api_port, webhook_port = free_port(), free_port()
+    runner = web.AppRunner(api.create_app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", api_port).start()
+
+    workdir = tempfile.mkdtemp(prefix="bee-e2e-")
+    db_path = os.path.join(workdir, "bee.db")
+    seed_database(db_path)
+    from database.creator import CHANNELS
+
+    # Ведущий процесс загружает ленты: без сети, из локальных синтетических лент
+    rss = FakeRss(CHANNELS, initial_items=5)
+    rss_port = free_port()
+    rss_runner = web.AppRunner(rss.create_app())
+    await rss_runner.setup()
+    await web.TCPSite(rss_runner, "127.0.0.1", rss_port).start()
+    env = dict(
+        os.environ,
+        BOT_TOKEN="123:fake", BOT_API_URL=f"http://127.0.0.1:{api_port}/bot",
+        BOT_MODE="webhook", WEBHOOK_WORKERS=str(args.workers), WEBHOOK_PORT=str(webhook_port),
+        WEBHOOK_URL=f"http://127.0.0.1:{webhook_port}/telegram", WEBHOOK_SECRET=SECRET,
+        RSS_BASE_URL=f"http://127.0.0.1:{rss_port}/rss/", DB_PATH=db_path, METRICS_PORT="0", LEADER_LEASE_TTL="3", SCHEDULE_TICK="1",
+        DELIVERY_POLL_INTERVAL="0.5", SCHEDULE_SPREAD="60", INFERENCE_BACKEND=args.backend,
+    )
+    bot = subprocess.Popen([sys.executable, os.path.join(ROOT, "bot", "bot.py")], cwd=ROOT, env=env)
+    started = time.monotonic()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async def post(update: dict) -> None:
+                async with session.post(f"http://127.0.0.1:{webhook_port}/telegram", json=update,
+                                        headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}) as response:
+                    assert response.status == 200, response.status
+
+            async def healthy() -> bool:
+                try:
+                    async with session.get(f"http://127.0.0.1:{webhook_port}/healthz") as response:
+                        return response.status == 200
+                except aiohttp.ClientError:
+                    return False
+
+            while not await healthy():
+                if bot.poll() is not None or time.monotonic() - started > 120:
+                    raise RuntimeError("Бот не запустился")
+                await asyncio.sleep(0.5)
+            print(f"Webhook доступен через {time.monotonic() - started:.1f} с")
+
+            def replies() -> list:
+                return [text for _, text in api.messages[CHAT_ID]]
+
+            await post(message_update(1, "/start"))
+            await wait_for(lambda: len(replies()) >= 1, 30, "ответ на /start")
+            await post(callback_update(2, "period_custom_minutes"))
+            await wait_for(lambda: len(replies()) >= 2, 30, "запрос числа минут")
+            await post(message_update(3, "1"))
+            await wait_for(lambda: any("Установлена периодичность" in text for text in replies()), 30,
+                           "подтверждение расписания")
+            print("Команды обработаны:", *replies(), sep="\n  ")
+
+            await wait_for(lambda: len(replies()) >= 4, 120, "сводка по расписанию")
+            print(f"Сводка по расписанию доставлена:\n  {replies()[3][:200]}")
+
+            def group_replies() -> list:
+                return [text for _, text in api.messages[GROUP_CHAT["id"]]]
+
+            async def stop_in_group(update_id: int) -> str:
+                count = len(group_replies())
+                await post(message_update(update_id, "/stop", GROUP_CHAT, ADMIN))
+                await wait_for(lambda: len(group_replies()) > count, 30, "ответ на /stop в группе")
+                return group_replies()[-1]
+
+            # Статус администратора кэшируется; запросы расходятся по процессам через SO_REUSEPORT
+            checks = 3 * args.workers
+            answers = [await stop_in_group(100 + i) for i in range(checks)]
+            assert not any("Только администраторы" in text for text in answers), answers
+            await post(demotion_update(200))
+
+            def demoted() -> bool:
+                conn = sqlite3.connect(db_path)
+                try:
+                    return conn.execute("SELECT status FROM member_statuses WHERE chat_id = ? AND user_id = ?",
+                                        (GROUP_CHAT["id"], ADMIN["id"])).fetchone() == ("member",)
+                finally:
+                    conn.close()
+
+            await wait_for(demoted, 30, "обработка chat_member")
+            answers = [await stop_in_group(300 + i) for i in range(checks)]
+            assert all("Только администраторы" in text for text in answers), answers
+            print(f"Снятие прав администратора применено во всех процессах ({checks} команд отклонено)")
+
+        conn = sqlite3.connect(db_path)
+        leaders = conn.execute("SELECT owner FROM leases WHERE expires_at > ?", (time.time(),)).fetchall()
+        conn.close()
+        assert len(leaders) == 1, leaders
+        print(f"Ведущий процесс: {leaders[0][0]}, запросов RSS: {rss.requests}")
+        print("Сквозная проверка пройдена")
+    finally:
+        bot.terminate()
+        bot.wait(timeout=30)
+        await runner.cleanup()
+        await rss_runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--backend", default=os.getenv("INFERENCE_BACKEND", "torch"))
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""Локальный сервер, имитирующий Telegram Bot API, для проверки доставки без реального Telegram.
+
+Поддерживает методы, которые использует бот (getMe, getUpdates, sendMessage,
+editMessageText, deleteMessage, getChatMember, answerCallbackQuery, deleteWebhook).
+Как и Telegram, отвечает 429 с retry_after при превышении общего лимита (30 сообщений
+в секунду) и лимитов чатов (раз в секунду в личный чат, 20 в минуту в группу).
+Может случайно отвечать 502 (--error-rate) и 403 для чатов из --blocked.
+Статистика доступна по GET /stats.
+
+Запуск из корня репозитория:
+    python benchmarks/fake_bot_api.py --port 8081
+    BOT_API_URL=http://127.0.0.1:8081/bot BOT_TOKEN=123:fake python bot/bot.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict, deque
+
+from aiohttp import web
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+# Права администратора в ответе getChatMember
+ADMIN_RIGHTS = {"can_be_edited": False, "can_manage_chat": True, "can_change_info": True,
+                "can_delete_messages": True, "can_invite_users": True, "can_restrict_members": True,
+                "can_promote_members": False, "can_manage_video_chats": True,
+                "can_post_stories": True, "can_edit_stories": True, "can_delete_stories": True,
+                "is_anonymous": False}
+
+GLOBAL_RATE = 30
+PRIVATE_INTERVAL = 1.0
+GROUP_PER_MINUTE = 20
+
+
+class FakeBotApi:
+    """Состояние фиктивного Bot API: отправленные сообщения, лимиты и счетчики."""
+
+    def __init__(self, error_rate: float = 0.0, blocked=(), strict: bool = True):
+        self.error_rate = error_rate
+        self.blocked = set(blocked)
+        self.strict = strict
+        self.messages = defaultdict(list)  # chat_id -> [(время, текст)]
+        self.stats = defaultdict(int)
+        self._message_id = 0
+        self._global = deque()
+        self._chat_sent = defaultdict(deque)
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self.handle)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "stats": dict(self.stats),
+            "chats": len(self.messages),
+            "messages": sum(len(items) for items in self.messages.values()),
+        })
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._params(request)
+        self.stats[method] += 1
+        handler = getattr(self, f"api_{method}", None)
+        if handler is None:
+            return self._ok(True)
+        if method == "getUpdates":
+            # Длинный опрос: обновлений нет, отвечаем по истечении таймаута
+            await asyncio.sleep(min(float(params.get("timeout") or 0), 10))
+        return handler(params)
+
+    async def _params(self, request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        params = {}
+        for key, value in (await request.post()).items():
+            try:
+                params[key] = json.loads(value)
+            except (TypeError, ValueError):
+                params[key] = value
+        return params
+
+    def _ok(self, result) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
+
+    def _error(self, code: int, description: str, retry_after: int = None) -> web.Response:
+        self.stats[f"error_{code}"] += 1
+        body = {"ok": False, "error_code": code, "description": description}
+        if retry_after is not None:
+            body["parameters"] = {"retry_after": retry_after}
+        return web.json_response(body, status=code)
+
+    def _chat(self, chat_id: int) -> dict:
+        return {"id": chat_id, "type": "supergroup" if chat_id < 0 else "private", "title": f"chat {chat_id}"}
+
+    def _message(self, chat_id: int, text: str, message_id: int = None) -> dict:
+        if message_id is None:
+            self._message_id += 1
+            message_id = self._message_id
+        return {"message_id": message_id, "date": int(time.time()), "chat": self._chat(chat_id),
+                "from": BOT_USER, "text": text}
+
+    def _check_limits(self, chat_id: int):
+        """Возвращает время ожидания в секундах, если отправка нарушает лимиты Telegram."""
+        now = time.monotonic()
+        while self._global and now - self._global[0] > 1.0:
+            self._global.popleft()
+        if len(self._global) >= GLOBAL_RATE:
+            return 1
+        sent = self._chat_sent[chat_id]
+        if chat_id < 0:
+            while sent and now - sent[0] > 60:
+                sent.popleft()
+            if len(sent) >= GROUP_PER_MINUTE:
+                return int(60 - (now - sent[0])) + 1
+        elif sent and now - sent[-1] < PRIVATE_INTERVAL:
+            return 1
+        self._global.append(now)
+        sent.append(now)
+        return None
+
+    def api_getMe(self, params: dict) -> web.Response:
+        return self._ok(BOT_USER)
+
+    def api_getUpdates(self, params: dict) -> web.Response:
+        return self._ok([])
+
+    def api_sendMessage(self, params: dict) -> web.Response:
+        chat_id, text = int(params["chat_id"]), params.get("text", "")
+        if chat_id in self.blocked:
+            return self._error(403, "Forbidden: bot was blocked by the user")
+        if not text or len(text) > 4096:
+            return self._error(400, "Bad Request: message text is empty or too long")
+        if self.strict:
+            retry_after = self._check_limits(chat_id)
+            if retry_after is not None:
+                return self._error(429, f"Too Many Requests: retry after {retry_after}", retry_after)
+        if random.random() < self.error_rate:
+            return self._error(502, "Bad Gateway")
+        self.messages[chat_id].append((time.time(), text))
+        self.stats["delivered"] += 1
+        return self._ok(self._message(chat_id, text))
+
+    def api_editMessageText(self, params: dict) -> web.Response:
+        return self._ok(self._message(int(params["chat_id"]), params.get("text", ""), int(params["message_id"])))
+
+    def api_getChatMember(self, params: dict) -> web.Response:
+        return self._ok({"status": "administrator", "user": {**BOT_USER, "id": int(params["user_id"])},
+                         **ADMIN_RIGHTS})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--blocked", type=int, nargs="*", default=[])
+    args = parser.parse_args()
+    api = FakeBotApi(error_rate=args.error_rate, blocked=args.blocked)
+    web.run_app(api.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Локальный сервер синтетических RSS-лент вместо tg.i-c-a.su для нагрузочных проверок.
+
+Отдает ленты каналов по адресу /rss/<канал>?limit=N в формате tg.i-c-a.su (RSS 2.0,
+pubDate в RFC 822). Содержимое детерминировано (--seed). Часть постов повторяется
+в других каналах почти дословно, как перепосты новостей ЦБ. Лента поддерживает
+ETag и If-None-Match. advance() или POST /advance?items=N добавляет новые посты
+во все каналы.
+
+Запуск из корня репозитория:
+    python benchmarks/fake_rss.py --port 8082
+    RSS_BASE_URL=http://127.0.0.1:8082/rss/ python bot/bot.py
+"""
+import argparse
+import hashlib
+import random
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+SUBJECTS = ["Банк России", "Минфин", "Сбербанк", "ВТБ", "Росстат", "Мосбиржа", "ФНС", "Правительство"]
+ACTIONS = ["сохранил ключевую ставку на уровне", "сообщил о росте показателя до", "снизил прогноз на",
+           "объявил о размещении на сумму", "зафиксировал инфляцию в", "повысил лимит до"]
+DETAILS = ["Решение принято на плановом заседании.", "Аналитики ожидали такого результата.",
+           "Рынок отреагировал ростом котировок.", "Подробности будут опубликованы позже.",
+           "Это максимальное значение с начала года.", "Эксперты связывают это с сезонным фактором."]
+
+
+def make_post(rng: random.Random, index: int) -> tuple:
+    """Возвращает (заголовок, текст) синтетического поста."""
+    subject, action = rng.choice(SUBJECTS), rng.choice(ACTIONS)
+    value = f"{rng.randint(1, 30)},{rng.randint(0, 9)}%"
+    title = f"{subject} {action} {value}"
+    body = " ".join([f"{title}."] + rng.sample(DETAILS, 3) + [f"Сообщение №{index}."])
+    return title, body
+
+
+def render_feed(channel: str, items: list) -> str:
+    """Собирает RSS 2.0; items — [(номер, заголовок, текст, время)] от новых к старым."""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0"><channel>',
+        f"<title>{escape(channel)}</title><link>https://t.me/{escape(channel)}</link>",
+    ]
+    for index, title, body, published in items:
+        link = f"https://t.me/{channel}/{index}"
+        parts.append(
+            f"<item><title>{escape(title)}</title><link>{link}</link><guid>{link}</guid>"
+            f"<pubDate>{format_datetime(published, usegmt=True)}</pubDate>"
+            f"<description>{escape(body.replace(' Это', '<br/>Это'))}</description></item>"
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts)
+
+
+class FakeRss:
+    """Синтетические ленты каналов с растущим числом постов."""
+
+    def __init__(self, channels: list, initial_items: int = 50, repost_rate: float = 0.2, seed: int = 1):
+        self.channels = list(channels)
+        self.repost_rate = repost_rate
+        self._rng = random.Random(seed)
+        self._posts = {channel: [] for channel in self.channels}
+        self._start = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(minutes=initial_items)
+        self._count = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.advance(initial_items)
+
+    def advance(self, items: int = 1) -> None:
+        """Добавляет items новых постов в каждый канал."""
+        for _ in range(items):
+            self._count += 1
+            published = self._start + timedelta(minutes=self._count)
+            for channel in self.channels:
+                posts = self._posts[channel]
+                other = self._posts[self._rng.choice(self.channels)]
+                if other and self._rng.random() < self.repost_rate:
+                    # Перепост: почти тот же текст из другого канала
+                    _, title, body, _ = other[-1]
+                    body = body.replace("Сообщение", "Источник: сообщение")
+                else:
+                    title, body = make_post(self._rng, self._count)
+                posts.append((len(posts) + 1, title, body, published))
+
+    def feed(self, channel: str, limit: int = 100) -> str:
+        return render_feed(channel, list(reversed(self._posts[channel][-limit:])))
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/rss/{channel}", self.handle_feed)
+        app.router.add_post("/advance", self.handle_advance)
+        return app
+
+    async def handle_feed(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        channel = request.match_info["channel"]
+        if channel not in self._posts:
+            return web.Response(status=404)
+        posts = self._posts[channel]
+        etag = '"' + hashlib.md5(f"{channel}:{len(posts)}".encode()).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        body = self.feed(channel, int(request.query.get("limit", "100")))
+        return web.Response(text=body, content_type="application/rss+xml", headers={"ETag": etag})
+
+    async def handle_advance(self, request: web.Request) -> web.Response:
+        self.advance(int(request.query.get("items", "1")))
+        return web.json_response({"items": self._count})
+
+
+def main() -> None:
+    import os
+    import sys
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from database.creator import CHANNELS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rss = FakeRss(CHANNELS, initial_items=args.items, seed=args.seed)
+    web.run_app(rss.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Сквозной нагрузочный тест бота без сети: фиктивные RSS и Bot API, модель-заглушка.
+
+Поднимает fake_rss.py и fake_bot_api.py на локальных портах и запускает бота в этом же
+процессе. Бот использует временную базу и бэкенд stub (STUB_TOKEN_DELAY задает время
+генерации одного токена). Сначала --chats чатов проходят /set и выбор периодичности.
+Затем выполняется --rounds раундов: в ленты добавляются новые посты, бот загружает их
+(update_news_db), и всем чатам одновременно готовится и отправляется сводка (путь
+send_news_summary). В конце печатаются доставки в секунду, p50/p99 задержки доставки,
+задержка цикла событий и пиковое потребление памяти.
+
+Запуск из корня репозитория:
+    python benchmarks/load_test.py --chats 200 --rounds 3
+"""
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bot')))
+from fake_bot_api import FakeBotApi
+from fake_rss import FakeRss
+
+
+async def start_server(app: web.Application) -> tuple:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def measure_loop_lag(samples: list, interval: float = 0.05) -> None:
+    """Записывает запаздывание пробуждений цикла событий относительно interval."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - started - interval))
+
+
+def message_update(update_id: int, chat_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": int(time.time()), "text": text,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Load"},
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text)}],
+        },
+    }
+
+
+def callback_update(update_id: int, chat_id: int, data: str) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id), "chat_instance": "load", "data": data,
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Load"},
+            "message": {"message_id": update_id, "date": int(time.time()), "text": "Выберите периодичность",
+                        "chat": {"id": chat_id, "type": "private"}},
+        },
+    }
+
+
+async def run(args) -> None:
+    # Настройки бота и путь к базе читаются при импорте модулей, поэтому окружение задается до них
+    os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bee-load-"), "bee.db")
+    from database.creator import CHANNELS
+
+    api = FakeBotApi(strict=args.strict_limits)
+    api_runner, api_port = await start_server(api.create_app())
+    rss = FakeRss(CHANNELS, initial_items=args.items, seed=args.seed)
+    rss_runner, rss_port = await start_server(rss.create_app())
+    os.environ.update(
+        BOT_TOKEN="123:fake", BOT_API_URL=f"http://127.0.0.1:{api_port}/bot",
+        RSS_BASE_URL=f"http://127.0.0.1:{rss_port}/rss/",
+        INFERENCE_BACKEND="stub", METRICS_PORT="0", ITEM_SUMMARIES="1" if args.item_summaries else "0",
+    )
+    os.environ.setdefault("STUB_TOKEN_DELAY", str(args.token_delay))
+    import bot as bee
+    from telegram import Update
+    from telegram.ext import CallbackContext
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    application = bee.build_application()
+    # Загрузку новостей тест вызывает сам, в начале каждого раунда
+    for job in application.job_queue.get_jobs_by_name("initial_db_update"):
+        job.schedule_removal()
+    bee.inference_pool.start()
+    await application.initialize()
+    await bee.on_startup(application)
+    await application.start()
+
+    lag_samples = []
+    lag_task = asyncio.create_task(measure_loop_lag(lag_samples))
+    context = CallbackContext(application)
+    chats = [10_000 + i for i in range(args.chats)]
+    latencies = []
+    ingest_seconds = []
+    try:
+        started = time.perf_counter()
+        update_id = 0
+        for chat_id in chats:
+            for data in (message_update(update_id + 1, chat_id, "/set"),
+                         callback_update(update_id + 2, chat_id, "period_hourly")):
+                await application.process_update(Update.de_json(data, application.bot))
+            update_id += 2
+        if args.channel_filters:
+            # Каждый чат читает один канал: наборы новостей и промпты у чатов разные
+            for index, chat_id in enumerate(chats):
+                await bee.chat_filters.set_channels(chat_id, [CHANNELS[index % len(CHANNELS)]])
+        print(f"/set для {len(chats)} чатов: {time.perf_counter() - started:.1f} с")
+
+        async def deliver(chat_id: int) -> None:
+            delivery_started = time.perf_counter()
+            await bee.deliver_news_summary(context, chat_id)
+            latencies.append(time.perf_counter() - delivery_started)
+
+        sent_before = api.stats["delivered"]
+        deliver_seconds = 0.0
+        for round_index in range(args.rounds):
+            if round_index:
+                rss.advance(args.new_items)
+            ingest_started = time.perf_counter()
+            await bee.update_news_db(context)
+            ingest_seconds.append(time.perf_counter() - ingest_started)
+            round_started = time.perf_counter()
+            await asyncio.gather(*(deliver(chat_id) for chat_id in chats))
+            deliver_seconds += time.perf_counter() - round_started
+        delivered = api.stats["delivered"] - sent_before
+    finally:
+        lag_task.cancel()
+        await application.stop()
+        await bee.on_shutdown(application)
+        await application.shutdown()
+        bee.inference_pool.shutdown(wait=False)
+        bee.db.close()
+        await rss_runner.cleanup()
+        await api_runner.cleanup()
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Загрузка новостей: {statistics.mean(ingest_seconds):.2f} с в среднем за раунд, "
+          f"запросов RSS: {rss.requests} (304: {rss.not_modified})")
+    print(f"Доставлено сводок: {delivered} за {deliver_seconds:.1f} с, {delivered / deliver_seconds:.1f} доставок/с")
+    print(f"Задержка доставки: p50 {percentile(latencies, 0.5):.2f} с, p99 {percentile(latencies, 0.99):.2f} с")
+    print(f"Задержка цикла событий: p99 {percentile(lag_samples, 0.99) * 1000:.1f} мс, "
+          f"максимум {max(lag_samples, default=0) * 1000:.1f} мс")
+    print(f"Пиковая память процесса: {peak_rss_mb:.0f} МБ")
+    print(f"Ответов Bot API 429: {api.stats['error_429']}")
+    paths = {sample.labels["path"]: int(sample.value) for metric in bee.SUMMARY_PATH.collect()
+             for sample in metric.samples if sample.name.endswith("_total")}
+    print("Способы подготовки сводок:", ", ".join(f"{path} {count}" for path, count in sorted(paths.items())))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--items", type=int, default=50, help="постов в каждой ленте перед первым раундом")
+    parser.add_argument("--new-items", type=int, default=5, help="новых постов в каждой ленте за раунд")
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--item-summaries", action="store_true", help="включить краткие сводки новостей")
+    parser.add_argument("--channel-filters", action="store_true",
+                        help="у каждого чата фильтр по одному каналу (разные промпты вместо общего кэша сводок)")
+    parser.add_argument("--strict-limits", action="store_true", help="фиктивный Bot API соблюдает лимиты Telegram")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+import logging
+import os
+import threading
+import time
+from typing import Iterator, List
+
+import torch
+from transformers import GPT2Tokenizer, T5ForConditionalGeneration, TextIteratorStreamer
+
+from monitoring.metrics import GENERATED_TOKENS, INFERENCE_SECONDS, TOKENS_PER_SECOND, instrument_encoder
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'RussianNLP/FRED-T5-Summarizer'
+
+
+class SummarizerBackend:
+    """Базовый бэкенд инференса: токенизатор FRED-T5 и пакетная генерация сводок."""
+
+    name = "base"
+
+    def __init__(self, model_name: str = MODEL_NAME, device: str = 'cpu'):
+        self.model_name = model_name
+        self.device = device
+        self.tokenizer = None
+        self.model = None
+
+    def load(self) -> None:
+        """Загружает токенизатор и модель."""
+        self.tokenizer = GPT2Tokenizer.from_pretrained(self._tokenizer_source(), eos_token='</s>')
+        # Для пакетной генерации промпты дополняются до одной длины
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = self._load_model()
+        logger.info(f"Бэкенд инференса {self.name} загружен")
+
+    def _tokenizer_source(self) -> str:
+        return self.model_name
+
+    def _load_model(self):
+        raise NotImplementedError
+
+    def generate(self, prompts: List[str], **params) -> List[str]:
+        """Генерирует сводки для пакета промптов одним вызовом модели."""
+        with INFERENCE_SECONDS.labels("tokenize").time():
+            inputs = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.device)
+        started = time.perf_counter()
+        with torch.no_grad():
+            outputs = self.model.generate(
+                inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                **params
+            )
+        elapsed = time.perf_counter() - started
+        # Время generate включает проход энкодера, который отдельно учитывается как encode
+        INFERENCE_SECONDS.labels("generate").observe(elapsed)
+        tokens = int((outputs != self.tokenizer.pad_token_id).sum())
+        GENERATED_TOKENS.inc(tokens)
+        if elapsed > 0:
+            TOKENS_PER_SECOND.set(tokens / elapsed)
+        with INFERENCE_SECONDS.labels("decode").time():
+            return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def stream(self, prompt: str, **params) -> Iterator[str]:
+        """Генерирует сводку одного промпта и отдает текст по мере появления токенов.
+
+        Потоковая выдача возможна только без beam search (жадный поиск или сэмплирование).
+        """
+        inputs = self.tokenizer([prompt], return_tensors="pt").to(self.device)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        errors = []
+
+        def generate():
+            try:
+                with torch.no_grad():
+                    self.model.generate(
+                        inputs["input_ids"],
+                        attention_mask=inputs["attention_mask"],
+                        streamer=streamer,
+                        **params
+                    )
+            except Exception as e:
+                errors.append(e)
+                # Завершаем итерацию, иначе потребитель будет ждать токенов вечно
+                streamer.end()
+
+        thread = threading.Thread(target=generate, name="stream-generate", daemon=True)
+        thread.start()
+        yield from streamer
+        thread.join()
+        if errors:
+            raise errors[0]
+
+
+class TorchBackend(SummarizerBackend):
+    """Исходная модель PyTorch в полной точности.
+
+    При первой загрузке веса и токенизатор сохраняются в cache_dir в формате
+    safetensors; последующие запуски отображают веса в память прямо из этой копии.
+    """
+
+    name = "torch"
+
+    def __init__(self, model_name: str = MODEL_NAME, device: str = 'cpu',
+                 cache_dir: str = None):
+        super().__init__(model_name, device)
+        self.cache_dir = cache_dir if cache_dir is not None else os.getenv("MODEL_CACHE_DIR", "models/fred-t5-safetensors")
+
+    def _has_cache(self) -> bool:
+        return bool(self.cache_dir) and os.path.isfile(os.path.join(self.cache_dir, "model.safetensors"))
+
+    def _tokenizer_source(self) -> str:
+        return self.cache_dir if self._has_cache() else self.model_name
+
+    def _load_model(self):
+        if self._has_cache():
+            model = T5ForConditionalGeneration.from_pretrained(self.cache_dir, low_cpu_mem_usage=True)
+        else:
+            model = T5ForConditionalGeneration.from_pretrained(self.model_name, low_cpu_mem_usage=True)
+            if self.cache_dir:
+                model.save_pretrained(self.cache_dir, safe_serialization=True)
+                self.tokenizer.save_pretrained(self.cache_dir)
+                logger.info(f"Копия модели в формате safetensors сохранена в {self.cache_dir}")
+        instrument_encoder(model)
+        return model.to(self.device).eval()
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch с динамическим квантованием линейных слоев в int8 (только CPU)."""
+
+    name = "torch-int8"
+
+    def _load_model(self):
+        model = super()._load_model()
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxBackend(SummarizerBackend):
+    """ONNX Runtime: экспортированные энкодер и декодер с KV-кэшем (decoder_with_past).
+
+    Экспорт выполняется один раз и сохраняется в export_dir.
+    Требует пакет optimum[onnxruntime].
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_name: str = MODEL_NAME, device: str = 'cpu',
+                 export_dir: str = None):
+        super().__init__(model_name, device)
+        self.export_dir = export_dir or os.getenv("ONNX_EXPORT_DIR", "models/fred-t5-onnx")
+
+    def _load_model(self):
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise RuntimeError(
+                "Для бэкенда onnx установите optimum[onnxruntime]"
+            ) from e
+        if os.path.isdir(self.export_dir):
+            return ORTModelForSeq2SeqLM.from_pretrained(self.export_dir, use_cache=True)
+        logger.info(f"Экспорт модели {self.model_name} в ONNX ({self.export_dir})")
+        model = ORTModelForSeq2SeqLM.from_pretrained(self.model_name, export=True, use_cache=True)
+        model.save_pretrained(self.export_dir)
+        return model
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    QuantizedTorchBackend.name: QuantizedTorchBackend,
+    OnnxBackend.name: OnnxBackend,
+}
+
+
+def create_backend(name: str, **kwargs) -> SummarizerBackend:
+    """Создает бэкенд инференса по имени из конфигурации (torch, torch-int8, onnx)."""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный бэкенд инференса: {name}. Доступны: {', '.join(BACKENDS)}") from None
+    return backend_class(**kwargs)
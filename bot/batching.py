@@ -0,0 +1,64 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Собирает промпты за короткое окно и отправляет их модели одним пакетом.
+
+    run_batch получает список промптов и возвращает список результатов в том же
+    порядке. Пакет отправляется по истечении окна или при наборе max_batch_size.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[str]], Awaitable[List[str]]],
+        window: float = 0.5,
+        max_batch_size: int = 8
+    ):
+        self._run_batch = run_batch
+        self.window = window
+        self.max_batch_size = max(1, max_batch_size)
+        self._pending = []  # [(prompt, future)]
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, prompt: str) -> str:
+        """Добавляет промпт в текущий пакет и ожидает результат генерации."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        # Промпты, чьи ожидающие уже отменены, не отправляем в модель
+        batch = [(prompt, future) for prompt, future in batch if not future.done()]
+        if not batch:
+            return
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch) -> None:
+        prompts = [prompt for prompt, _ in batch]
+        logger.info(f"Генерация пакета из {len(prompts)} промптов")
+        try:
+            results = await self._run_batch(prompts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -1,31 +1,175 @@
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
-from telegram.ext import JobQueue
+from telegram.ext import Application, ChatMemberHandler, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
 from telegram.error import Forbidden
 from dotenv import load_dotenv
 import os
 import asyncio
+import multiprocessing
+import signal
 import sys
+import time
 from uuid import uuid4
-from transformers import GPT2Tokenizer, T5ForConditionalGeneration
-import torch
-import sqlite3
 from datetime import datetime, timedelta
 
 # Добавляем родительскую директорию в системный путь для импорта модуля базы данных
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from database.creator import update_db
-
-# Инициализация модели T5 для суммаризации новостей
-tokenizer = GPT2Tokenizer.from_pretrained('RussianNLP/FRED-T5-Summarizer', eos_token='</s>')
-model = T5ForConditionalGeneration.from_pretrained('RussianNLP/FRED-T5-Summarizer')
-device = 'cpu'
-model.to(device)
+from database.creator import update_db_async, prune_db
+from database.db import DB_PATH, get_database
+from inference import InferencePool, InferenceQueueFull
+from item_summarizer import ItemSummaryWorker
+from summary_cache import SummaryCache
+from batching import MicroBatcher
+from streaming import ProgressiveMessage, stream_in_pool
+from delivery import DeliveryQueue
+from permissions import MemberStatusCache, SharedMemberStatusCache
+from news_filters import ChatFilterStore, fresh_news_query
+from news_index import HotNewsIndex
+from monitoring.metrics import (
+    DB_QUERY_SECONDS, DELIVERY_STAGE_SECONDS, NEWS_INDEX_LOOKUPS, SUMMARY_FALLBACKS, SUMMARY_PATH,
+    monitor_event_loop, start_metrics_server
+)
+from generation_policy import GenerationPolicy, PATH_BEAM, PATH_GREEDY, PATH_EXTRACTIVE
+import extractive
+from scheduler import SubscriptionStore, DatabaseSchedule, schedule_chat, unschedule_chat, restore_jobs
+from cluster import InputStateStore, LeaderLease, worker_id
+from webhook import register_webhook, run_webhook_worker
+from model_manager import ModelManager
+from prompt_builder import PromptBuilder, TELEGRAM_MESSAGE_LIMIT, max_new_tokens_for_message
+from database.creator import CHANNELS
 
 # Загрузка переменных окружения
 load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+# Адрес Bot API (например, локальный сервер benchmarks/fake_bot_api.py); токен дописывается в конец
+BOT_API_URL = os.getenv("BOT_API_URL", "https://api.telegram.org/bot")
+
+# Режим работы: polling (один процесс) или webhook (несколько процессов за одним портом
+# с общим состоянием в базе; загрузку новостей и расписание ведет выбранный ведущий процесс)
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_MODE = BOT_MODE == "webhook"
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "2")) if WEBHOOK_MODE else 1
+LEADER_LEASE_TTL = float(os.getenv("LEADER_LEASE_TTL", "30"))
+SCHEDULE_TICK = float(os.getenv("SCHEDULE_TICK", "15"))
+DELIVERY_POLL_INTERVAL = float(os.getenv("DELIVERY_POLL_INTERVAL", "2"))
+DELIVERY_CLAIM_LIMIT = int(os.getenv("DELIVERY_CLAIM_LIMIT", "4"))
+
+# Исходящие сообщения проходят через очередь с лимитами Telegram (общим и по чатам)
+DELIVERY_OPTIONS = {
+    # Лимит Telegram общий для токена, поэтому делится между процессами
+    "global_rate": float(os.getenv("DELIVERY_GLOBAL_RATE", "30")) / WEBHOOK_WORKERS,
+    "private_interval": float(os.getenv("DELIVERY_PRIVATE_INTERVAL", "1")),
+    "group_interval": float(os.getenv("DELIVERY_GROUP_INTERVAL", "3")),
+    "workers": int(os.getenv("DELIVERY_WORKERS", "8")),
+    "retries": int(os.getenv("DELIVERY_RETRIES", "5")),
+}
+
+# Настройки пула инференса: генерация выполняется вне цикла событий бота
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "8"))
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "300"))
+
+# Модель T5 для суммаризации загружается лениво в фоне после запуска бота; бэкенд выбирается в конфигурации.
+# Потоки torch делятся между рабочими, чтобы параллельные генерации не конкурировали за ядра.
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+model_manager = ModelManager(
+    INFERENCE_BACKEND,
+    num_threads=max(1, (os.cpu_count() or 1) // (INFERENCE_WORKERS * WEBHOOK_WORKERS))
+)
+inference_pool = InferencePool(
+    workers=INFERENCE_WORKERS,
+    max_queue=INFERENCE_QUEUE_SIZE,
+    timeout=INFERENCE_TIMEOUT
+)
+
+# Срок хранения новостей в базе (в днях)
+NEWS_RETENTION_DAYS = float(os.getenv("NEWS_RETENTION_DAYS", "7"))
+
+# Параметры генерации сводки; входят в ключ кэша сводок
+SUMMARY_HEADER = "📈 Экономическая сводка:\n\n"
+SOURCES_PREFIX = "\n\nСписок источников: "
+
+# Бюджет генерации выводится из лимита Telegram: сводка вместе с заголовком и полным
+# списком источников должна поместиться в одно сообщение (CHARS_PER_TOKEN — оценка снизу)
+MAX_NEW_TOKENS = max_new_tokens_for_message(
+    len(SUMMARY_HEADER) + len(SOURCES_PREFIX) + len(", ".join(CHANNELS)),
+    float(os.getenv("CHARS_PER_TOKEN", "3"))
+)
+
+GENERATION_PARAMS = {
+    "max_new_tokens": MAX_NEW_TOKENS,
+    "min_new_tokens": min(50, MAX_NEW_TOKENS),
+    "num_beams": 5,
+    "early_stopping": True,
+    "no_repeat_ngram_size": 4,
+    "top_p": 0.9,
+    "do_sample": True,
+}
+
+# Потоковая генерация для команды /news: без beam search (жадный поиск или сэмплирование),
+# текст появляется в сообщении по мере генерации. Рассылки по расписанию используют GENERATION_PARAMS.
+STREAM_GENERATION_PARAMS = {
+    "max_new_tokens": MAX_NEW_TOKENS,
+    "min_new_tokens": min(50, MAX_NEW_TOKENS),
+    "num_beams": 1,
+    "no_repeat_ngram_size": 4,
+    "do_sample": os.getenv("STREAM_SAMPLING", "0") == "1",
+}
+if STREAM_GENERATION_PARAMS["do_sample"]:
+    STREAM_GENERATION_PARAMS["top_p"] = 0.9
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.5"))
+
+# Упрощенная генерация рассылок под нагрузкой: жадный поиск вместо beam search
+GREEDY_GENERATION_PARAMS = {
+    "max_new_tokens": MAX_NEW_TOKENS,
+    "min_new_tokens": min(50, MAX_NEW_TOKENS),
+    "num_beams": 1,
+    "no_repeat_ngram_size": 4,
+    "do_sample": False,
+}
+PATH_GENERATION_PARAMS = {PATH_BEAM: GENERATION_PARAMS, PATH_GREEDY: GREEDY_GENERATION_PARAMS}
+
+# Пакетирование: промпты, пришедшие в пределах окна, генерируются одним вызовом model.generate
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+summary_batchers = {
+    path: MicroBatcher(
+        lambda prompts, path=path: inference_pool.run(get_summaries, prompts, path),
+        window=float(os.getenv("BATCH_WINDOW", "0.5")),
+        max_batch_size=BATCH_MAX_SIZE
+    )
+    for path in PATH_GENERATION_PARAMS
+}
+
+# Под нагрузкой рассылки переходят с beam search на жадный поиск, а затем на
+# извлечение ключевых предложений без модели, чтобы сводки приходили вовремя
+generation_policy = GenerationPolicy(
+    inference_pool,
+    slo=float(os.getenv("SUMMARY_SLO", "120")),
+    greedy_depth=int(os.getenv("GREEDY_QUEUE_DEPTH", "2")),
+    extractive_depth=int(os.getenv("EXTRACTIVE_QUEUE_DEPTH", str(max(1, INFERENCE_QUEUE_SIZE - 2)))),
+    batch_size=BATCH_MAX_SIZE,
+    adaptive=os.getenv("ADAPTIVE_GENERATION", "1") != "0"
+)
+EXTRACTIVE_MAX_SENTENCES = int(os.getenv("EXTRACTIVE_MAX_SENTENCES", "5"))
+
+# Общий пул соединений с базой (WAL); запросы выполняются вне цикла событий
+db = get_database(DB_PATH)
+
+# Общий кэш сводок: чаты с одинаковым набором новостей используют одну генерацию
+summary_cache = SummaryCache(
+    db,
+    ttl=float(os.getenv("SUMMARY_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("SUMMARY_CACHE_SIZE", "256"))
+)
+
+# Метрики Prometheus отдаются по локальному HTTP (0 отключает сервер метрик)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+METRICS_ADDR = os.getenv("METRICS_ADDR", "127.0.0.1")
 
 # Настройка логирования
 logging.basicConfig(
@@ -34,32 +178,98 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Хранилище расписаний чатов (периодичность в минутах, текст для отображения, время последней отправки)
-chat_schedules = {}
+DELIVERY_CURSOR_QUERY = "SELECT last_delivered_pub_date, last_news_id FROM delivery_cursors WHERE chat_id = ?"
+
+SAVE_DELIVERY_CURSOR_QUERY = """
+    INSERT OR REPLACE INTO delivery_cursors (chat_id, last_delivered_pub_date, last_news_id, updated_at)
+    VALUES (?, ?, ?, ?)
+"""
+
+# Выборка новостей после курсора чата (pub_date, id): диапазонный поиск по индексу idx_news_pub_date
+FRESH_NEWS_QUERY = """
+    SELECT id, title, content, channel, pub_date, cluster_id
+    FROM news
+    WHERE pub_date >= ? AND (pub_date > ? OR id > ?)
+    ORDER BY pub_date DESC, id DESC
+    LIMIT ?
+"""
+
+# Свежие новости в памяти: выборка после курсора чата без запроса к базе
+news_index = HotNewsIndex(
+    db,
+    max_items=int(os.getenv("NEWS_INDEX_SIZE", "5000")),
+    max_age_hours=float(os.getenv("NEWS_INDEX_HOURS", "24")),
+    refresh_interval=float(os.getenv("NEWS_INDEX_REFRESH", "30"))
+)
+
+# Фильтры чатов по каналам и ключевым словам (полнотекстовый индекс news_fts)
+chat_filters = ChatFilterStore(db)
+MAX_FILTER_KEYWORDS = int(os.getenv("MAX_FILTER_KEYWORDS", "10"))
+
+# Промпт собирается из свежих новостей в пределах бюджета входных токенов
+NEWS_CANDIDATES = int(os.getenv("NEWS_CANDIDATES", "20"))
+prompt_builder = PromptBuilder(
+    db,
+    tokenizer_provider=lambda: model_manager.get_backend().tokenizer,
+    tokenizer_name=INFERENCE_BACKEND,
+    input_token_budget=int(os.getenv("PROMPT_TOKEN_BUDGET", "1024")),
+    item_token_limit=int(os.getenv("PROMPT_ITEM_TOKEN_LIMIT", "256"))
+)
+
+# Краткие сводки отдельных новостей готовятся в фоне после загрузки (map), при доставке
+# они только объединяются (reduce); полная генерация остается запасным путем
+ITEM_SUMMARIES = os.getenv("ITEM_SUMMARIES", "1") != "0"
+DIGEST_MAX_ITEMS = int(os.getenv("DIGEST_MAX_ITEMS", "7"))
+# Место под текст сводки без модели: заголовок и список источников в худшем случае
+DIGEST_TEXT_BUDGET = TELEGRAM_MESSAGE_LIMIT - len(SUMMARY_HEADER) - len(SOURCES_PREFIX) - len(", ".join(CHANNELS))
+
+ITEM_GENERATION_PARAMS = {
+    "max_new_tokens": int(os.getenv("ITEM_SUMMARY_MAX_TOKENS", "80")),
+    "num_beams": 2,
+    "early_stopping": True,
+    "no_repeat_ngram_size": 4,
+    "do_sample": False,
+}
+
+NEWS_ITEM_SUMMARIES_QUERY = "SELECT news_id, summary FROM news_summaries WHERE news_id IN ({})"
+
+item_worker = ItemSummaryWorker(
+    db,
+    inference_pool,
+    prompt_builder,
+    lambda prompts: get_item_summaries(prompts),
+    batch_size=int(os.getenv("ITEM_SUMMARY_BATCH_SIZE", "4"))
+)
+
+# Хранилище подписок чатов (периодичность в минутах, текст для отображения, время последней отправки)
+subscriptions = SubscriptionStore(db)
+
+# Состояние ожидания ввода периодичности хранится в базе и доступно любому процессу бота
+input_states = InputStateStore(db)
+
+# Параметры распределения отправок: слоты чатов разнесены по окну SCHEDULE_SPREAD секунд
+# относительно общей точки отсчета (по умолчанию 06:00 UTC = 09:00 МСК)
+SCHEDULE_OPTIONS = {
+    "spread": float(os.getenv("SCHEDULE_SPREAD", "3600")),
+    "anchor": float(os.getenv("SCHEDULE_ANCHOR", str(6 * 3600))),
+    "catchup_window": float(os.getenv("SCHEDULE_CATCHUP_WINDOW", "300")),
+}
+
+# Кэш статусов бота и пользователей в чатах для проверки прав без запросов к Telegram.
+# В режиме webhook кэш в базе: изменение статуса, полученное одним процессом, видят все
+PERMISSIONS_CACHE_TTL = float(os.getenv("PERMISSIONS_CACHE_TTL", "600"))
+member_cache = (SharedMemberStatusCache(db, ttl=PERMISSIONS_CACHE_TTL) if WEBHOOK_MODE
+                else MemberStatusCache(ttl=PERMISSIONS_CACHE_TTL))
+
+# Режим webhook: расписание и задачи доставки в базе, ведущий процесс выбирается арендой
+db_schedule = DatabaseSchedule(db, **SCHEDULE_OPTIONS)
+WORKER_ID = worker_id()
+leader_lease = LeaderLease(db, WORKER_ID, ttl=LEADER_LEASE_TTL)
 
 # Константы для состояний ввода пользователя
 STATE_WAITING_MINUTES = "waiting_minutes"
 STATE_WAITING_DAYS = "waiting_days"
 
-def init_processed_news_table():
-    """Инициализирует таблицу processed_news в базе данных."""
-    db_path = "database/bee.db"
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS processed_news (
-                news_id INTEGER PRIMARY KEY,
-                processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        conn.commit()
-        logger.info("Таблица processed_news инициализирована")
-    except Exception as e:
-        logger.error(f"Ошибка при инициализации таблицы processed_news: {e}")
-    finally:
-        conn.close()
-
 def get_periodicity_keyboard() -> InlineKeyboardMarkup:
     """Создает инлайн-клавиатуру для выбора периодичности отправки новостей."""
     keyboard = [
@@ -91,8 +301,7 @@ async def check_bot_permissions(update: Update, context: ContextTypes.DEFAULT_TY
 
     # Проверяем, является ли бот администратором
     try:
-        bot_member = await context.bot.get_chat_member(chat_id, context.bot.id)
-        if bot_member.status not in ["administrator", "creator"]:
+        if not await member_cache.is_admin(context.bot, chat_id, context.bot.id):
             await update.message.reply_text(
                 "Ошибка: Бот должен быть администратором в группе или канале для выполнения этой команды."
             )
@@ -108,8 +317,7 @@ async def check_bot_permissions(update: Update, context: ContextTypes.DEFAULT_TY
     # Проверяем, является ли пользователь администратором в группах или супергруппах
     if chat_type in ["group", "supergroup"]:
         try:
-            user_member = await context.bot.get_chat_member(chat_id, user_id)
-            if user_member.status not in ["administrator", "creator"]:
+            if not await member_cache.is_admin(context.bot, chat_id, user_id):
                 await update.message.reply_text(
                     "Ошибка: Только администраторы группы могут использовать команды бота."
                 )
@@ -142,6 +350,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         welcome_message += "\n\nУбедитесь, что бот имеет права на отправку сообщений в канал."
     elif chat_type in ["group", "supergroup"]:
         welcome_message += "\n\nВ группах команды доступны только администраторам."
+    if not model_manager.is_ready:
+        welcome_message += "\n\nМодель сводок еще загружается, первая сводка может прийти с задержкой."
 
     await update.message.reply_text(welcome_message)
 
@@ -158,6 +368,9 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         "Доступные команды:\n"
         "- /start: Запустите бота и получите приветственное сообщение.\n"
         "- /set: Настройте периодичность отправки новостей с помощью кнопок.\n"
+        "- /news: Получить сводку последних новостей прямо сейчас.\n"
+        "- /channels: Выбрать каналы для сводок (например, /channels banki_oil cb_economics).\n"
+        "- /topics: Выбрать темы для сводок через запятую (например, /topics ключевая ставка, инфляция).\n"
         "- /stop: Остановить отправку новостей в этом чате.\n"
         "- /help: Просмотрите список доступных команд."
     )
@@ -193,31 +406,18 @@ async def handle_periodicity_choice(update: Update, context: ContextTypes.DEFAUL
 
     if callback_data in periodicity_map:
         minutes, display_text = periodicity_map[callback_data]
-        chat_schedules[chat_id] = {
-            "minutes": minutes,
-            "display": display_text,
-            "last_sent": None  # Инициализируем как None для первой отправки
-        }
+        await subscriptions.set(chat_id, minutes, display_text)
         await query.message.reply_text(f"Установлена периодичность: каждый {display_text}.")
 
-        if chat_id in context.chat_data:
-            context.chat_data[chat_id].schedule_removal()
-
-        job = context.job_queue.run_repeating(
-            send_news_summary,
-            interval=minutes * 60,
-            first=0,
-            data=chat_id
-        )
-        context.chat_data[chat_id] = job
+        await apply_schedule(context, chat_id, minutes)
         logger.info(f"Установлено расписание для чата {chat_id}: каждый {display_text}")
 
     elif callback_data == "period_custom_minutes":
-        context.user_data["state"] = STATE_WAITING_MINUTES
+        await input_states.set(chat_id, query.from_user.id, STATE_WAITING_MINUTES)
         await query.message.reply_text("Пожалуйста, введите количество минут (например, 30):")
         logger.info(f"Ожидается ввод минут в чате {chat_id}")
     elif callback_data == "period_custom_days":
-        context.user_data["state"] = STATE_WAITING_DAYS
+        await input_states.set(chat_id, query.from_user.id, STATE_WAITING_DAYS)
         await query.message.reply_text("Пожалуйста, введите количество дней (например, 2):")
         logger.info(f"Ожидается ввод дней в чате {chat_id}")
 
@@ -243,7 +443,7 @@ async def handle_custom_periodicity(update: Update, context: ContextTypes.DEFAUL
         return
 
     value = int(text)
-    state = context.user_data.get("state")
+    state = await input_states.get(chat_id, update.effective_user.id)
 
     if state == STATE_WAITING_MINUTES:
         minutes = value
@@ -264,135 +464,370 @@ async def handle_custom_periodicity(update: Update, context: ContextTypes.DEFAUL
         logger.error(f"Неизвестное состояние в чате {chat_id}")
         return
 
-    chat_schedules[chat_id] = {
-        "minutes": minutes,
-        "display": display_text,
-        "last_sent": None  # Инициализируем как None для первой отправки
-    }
+    await subscriptions.set(chat_id, minutes, display_text)
     await update.message.reply_text(f"Установлена периодичность: каждые {display_text}.")
 
-    if chat_id in context.chat_data:
-        context.chat_data[chat_id].schedule_removal()
-
-    job = context.job_queue.run_repeating(
-        send_news_summary,
-        interval=minutes * 60,
-        first=0,
-        data=chat_id
-    )
-    context.chat_data[chat_id] = job
+    await apply_schedule(context, chat_id, minutes)
     logger.info(f"Установлено расписание для чата {chat_id}: каждые {display_text}")
 
-    context.user_data.pop("state", None)
+    await input_states.clear(chat_id, update.effective_user.id)
+
+async def apply_schedule(context: ContextTypes.DEFAULT_TYPE, chat_id: int, minutes: int) -> None:
+    """Ставит рассылку чата: в JobQueue процесса (polling) или в общее расписание в базе (webhook)."""
+    if WEBHOOK_MODE:
+        await db_schedule.schedule(chat_id, minutes)
+    else:
+        schedule_chat(context.job_queue, send_news_summary, chat_id, minutes, **SCHEDULE_OPTIONS)
+
+async def cancel_schedule(context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> bool:
+    """Снимает запланированные отправки чата; возвращает True, если они были."""
+    if WEBHOOK_MODE:
+        return await db_schedule.unschedule(chat_id)
+    return unschedule_chat(context.job_queue, chat_id)
 
 async def send_news_summary(context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Отправляет сводку новостей в указанный чат."""
-    chat_id = context.job.data
-    news_summary = get_news_summary(chat_id)
+    """Отправляет сводку новостей в чат задачи JobQueue."""
+    await deliver_news_summary(context, context.job.data)
+
+async def deliver_news_summary(context: ContextTypes.DEFAULT_TYPE, chat_id: int) -> None:
+    """Готовит и отправляет сводку новостей в указанный чат."""
+    with DELIVERY_STAGE_SECONDS.labels("summary").time():
+        news_summary = await get_news_summary(chat_id)
     try:
-        await context.bot.send_message(chat_id=chat_id, text=news_summary)
+        with DELIVERY_STAGE_SECONDS.labels("send").time():
+            await context.bot_data["delivery_queue"].send(chat_id, news_summary)
         logger.info(f"Отправлена сводка новостей в чат {chat_id}")
         # Обновляем время последней отправки после успешной отправки
-        if chat_id in chat_schedules:
-            chat_schedules[chat_id]["last_sent"] = datetime.now()
+        await subscriptions.mark_sent(chat_id, datetime.now())
     except Forbidden:
         logger.error(f"Ошибка: Бот не имеет прав для отправки сообщений в чат {chat_id}")
-        if chat_id in context.chat_data:
-            context.chat_data[chat_id].schedule_removal()
-            del context.chat_data[chat_id]
-            del chat_schedules[chat_id]
+        await cancel_schedule(context, chat_id)
+        await subscriptions.delete(chat_id)
+        await chat_filters.clear(chat_id)
     except Exception as e:
         logger.error(f"Ошибка отправки сообщения в чат {chat_id}: {e}")
 
+def get_summaries(prompts: list, path: str = PATH_BEAM) -> list:
+    """Генерирует сводки для пакета промптов одним вызовом модели T5 (вызывается из пула инференса)."""
+    backend = model_manager.get_backend()
+    started = time.perf_counter()
+    summaries = backend.generate(prompts, **PATH_GENERATION_PARAMS[path])
+    generation_policy.record(path, time.perf_counter() - started)
+    return summaries
+
+def get_item_summaries(prompts: list) -> list:
+    """Генерирует краткие сводки отдельных новостей (фоновая задача пула инференса)."""
+    return model_manager.get_backend().generate(prompts, **ITEM_GENERATION_PARAMS)
+
 def get_summary(prompt) -> str:
     """Генерирует сводку новостей с помощью модели T5."""
-    input_ids = tokenizer.encode(prompt, return_tensors="pt").to(device)
-    outputs = model.generate(
-        input_ids,
-        max_new_tokens=3000,
-        min_new_tokens=50,
-        num_beams=5,
-        early_stopping=True,
-        no_repeat_ngram_size=4,
-        top_p=0.9,
-        do_sample=True
+    return get_summaries([prompt])[0]
+
+def get_summary_stream(prompt: str):
+    """Генерирует сводку по одному промпту, отдавая текст по частям (вызывается из пула инференса)."""
+    return model_manager.get_backend().stream(prompt, **STREAM_GENERATION_PARAMS)
+
+def one_per_cluster(news: list) -> list:
+    """Оставляет по одной (самой свежей) новости из каждого кластера почти дубликатов."""
+    seen, result = set(), []
+    for item in news:
+        cluster_id = item[5] or item[0]
+        if cluster_id not in seen:
+            seen.add(cluster_id)
+            result.append(item)
+    return result
+
+async def reduce_item_summaries(fresh_news: list) -> tuple:
+    """Собирает сводку из готовых кратких сводок новостей без обращения к модели.
+
+    Сводки должны быть у всех новостей-кандидатов (до DIGEST_MAX_ITEMS): курсор чата
+    сдвигается на самую свежую новость выборки, и пропущенная новость без сводки не
+    попала бы ни в одну рассылку. Если хотя бы у одной сводки нет, возвращает
+    (None, fresh_news), и сводка генерируется целиком.
+    """
+    if not ITEM_SUMMARIES:
+        return None, fresh_news
+    candidates = fresh_news[:DIGEST_MAX_ITEMS]
+    rows = await db.fetchall(
+        NEWS_ITEM_SUMMARIES_QUERY.format(', '.join('?' * len(candidates))),
+        [item[0] for item in candidates]
     )
-    return tokenizer.decode(outputs[0], skip_special_tokens=True)
+    item_summaries = {row[0]: row[1] for row in rows if row[1]}
+    if any(item[0] not in item_summaries for item in candidates):
+        return None, fresh_news
+
+    lines, used = [], []
+    for item in candidates:
+        line = f"• {item_summaries[item[0]]}"
+        if used and sum(len(text) + 1 for text in lines) + len(line) > DIGEST_TEXT_BUDGET:
+            break
+        lines.append(line)
+        used.append(item)
+    logger.info(f"Сводка собрана из {len(used)} готовых кратких сводок новостей")
+    return "\n".join(lines), used
+
+async def select_fresh_news(chat_id: int, last_pub_date: str, last_news_id: int) -> tuple:
+    """Выбирает новости после курсора чата с учетом его фильтров; возвращает (новости, есть ли фильтры)."""
+    filters = await chat_filters.get(chat_id)
+    if filters is None or not filters["keywords"]:
+        # Без фильтра по темам хватает индекса в памяти (фильтр по каналам проверяется при проходе)
+        await news_index.refresh()
+        rows = news_index.select(last_pub_date, last_news_id, NEWS_CANDIDATES, filters and filters["channels"])
+        NEWS_INDEX_LOOKUPS.labels("hit" if rows is not None else "miss").inc()
+        if rows is not None:
+            return rows, filters is not None
+    if filters is None:
+        with DB_QUERY_SECONDS.labels("fresh_news").time():
+            rows = await db.fetchall(FRESH_NEWS_QUERY, (last_pub_date, last_pub_date, last_news_id, NEWS_CANDIDATES))
+        return rows, False
+    sql, params = fresh_news_query(filters["channels"], filters["keywords"])
+    with DB_QUERY_SECONDS.labels("fresh_news_filtered").time():
+        rows = await db.fetchall(sql, params + [last_pub_date, last_pub_date, last_news_id, NEWS_CANDIDATES])
+    return rows, True
+
+async def generate_summary(chat_id: int, fresh_news: list) -> tuple:
+    """Готовит сводку способом, выбранным политикой по загрузке пула инференса; возвращает (сводка, новости).
+
+    Если генерация не удалась (очередь заполнена, таймаут, ошибка модели), сводка
+    собирается извлечением ключевых предложений вместо текста об ошибке. Пока модель
+    загружается, сводка сразу собирается без модели.
+    """
+    if model_manager.is_ready or not generation_policy.adaptive:
+        try:
+            # Формируем промпт для суммаризации
+            with DELIVERY_STAGE_SECONDS.labels("prompt").time():
+                prompt, used = await prompt_builder.build(fresh_news)
+            news_ids = [item[0] for item in used]
+
+            # Готовая сводка beam search используется при любой загрузке
+            beam_key = SummaryCache.make_key(news_ids, GENERATION_PARAMS)
+            summary = await summary_cache.get(beam_key)
+            if summary is not None:
+                SUMMARY_PATH.labels(PATH_BEAM).inc()
+                return summary, used
+
+            with generation_policy.select(beam_key) as path:
+                if path != PATH_EXTRACTIVE:
+                    # Генерация уходит в пул инференса, цикл событий продолжает обрабатывать команды.
+                    # Одинаковый набор новостей генерируется один раз для всех чатов.
+                    cache_key = SummaryCache.make_key(news_ids, PATH_GENERATION_PARAMS[path])
+                    with DELIVERY_STAGE_SECONDS.labels("generate").time():
+                        summary = await summary_cache.get_or_create(
+                            cache_key, lambda: summary_batchers[path].submit(prompt)
+                        )
+                    SUMMARY_PATH.labels(path).inc()
+                    return summary, used
+        except InferenceQueueFull:
+            logger.warning(f"Очередь инференса заполнена, сводка для чата {chat_id} собирается без модели")
+            SUMMARY_FALLBACKS.labels("queue_full").inc()
+        except asyncio.TimeoutError:
+            logger.error(f"Превышено время генерации сводки для чата {chat_id}, сводка собирается без модели")
+            SUMMARY_FALLBACKS.labels("timeout").inc()
+        except Exception as e:
+            logger.error(f"Ошибка генерации сводки для чата {chat_id}, сводка собирается без модели: {e}")
+            SUMMARY_FALLBACKS.labels("error").inc()
+    with DELIVERY_STAGE_SECONDS.labels("extractive").time():
+        summary, used = await asyncio.to_thread(
+            extractive.summarize, fresh_news[:DIGEST_MAX_ITEMS], DIGEST_TEXT_BUDGET, EXTRACTIVE_MAX_SENTENCES
+        )
+    SUMMARY_PATH.labels(PATH_EXTRACTIVE).inc()
+    return summary, used
 
-def get_news_summary(chat_id: int) -> str:
+async def get_news_summary(chat_id: int) -> str:
     """Получает и суммирует новости, в первый раз все последние, затем только новые."""
-    db_path = "database/bee.db"
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # Получаем настройки чата
-        schedule = chat_schedules.get(chat_id, {})
-        minutes = schedule.get("minutes", 60)  # По умолчанию 60 минут
-        last_sent = schedule.get("last_sent")
-
-        # Получаем список уже обработанных новостей
-        cursor.execute("SELECT news_id FROM processed_news")
-        processed_ids = {row[0] for row in cursor.fetchall()}
-
-        if last_sent is None:
-            # Для первой отправки берем до 7 последних необработанных новостей
-            cursor.execute(
-                """
-                SELECT id, title, content, channel 
-                FROM news 
-                WHERE id NOT IN (SELECT news_id FROM processed_news)
-                ORDER BY pub_date DESC
-                LIMIT 7
-                """
-            )
-            news_items = cursor.fetchall()
-            is_first_run = True
-        else:
-            # Для последующих отправок берем новости с момента последней отправки
-            cursor.execute(
-                """
-                SELECT id, title, content, channel 
-                FROM news 
-                WHERE pub_date >= ? AND id NOT IN (SELECT news_id FROM processed_news)
-                ORDER BY pub_date DESC
-                LIMIT 7
-                """,
-                (last_sent.strftime('%Y-%m-%d %H:%M:%S'),)
-            )
-            news_items = cursor.fetchall()
-            is_first_run = False
-
-        # Фильтруем новости, исключая уже обработанные (на случай ошибки в SQL)
-        fresh_news = [item for item in news_items if item[0] not in processed_ids]
+        # Курсор доставки чата: последняя отправленная новость (pub_date, id).
+        # При первой отправке курсора нет и берутся последние новости в пределах бюджета промпта.
+        with DB_QUERY_SECONDS.labels("delivery_cursor").time():
+            delivery_cursor = await db.fetchone(DELIVERY_CURSOR_QUERY, (chat_id,))
+        is_first_run = delivery_cursor is None
+        last_pub_date, last_news_id = delivery_cursor or ("", 0)
+        fresh_news, filtered = await select_fresh_news(chat_id, last_pub_date, last_news_id)
 
         if not fresh_news:
-            message = "На данный момент нет новых экономических новостей." if not is_first_run else "В базе данных отсутствуют доступные новости."
+            if filtered:
+                message = "Нет новых новостей, подходящих под фильтры чата (/channels, /topics)."
+            else:
+                message = "На данный момент нет новых экономических новостей." if not is_first_run else "В базе данных отсутствуют доступные новости."
             logger.info(f"{message} для чата {chat_id}")
             return message
 
-        # Формируем промпт для суммаризации
-        prompt = "Суммаризируй следующие экономические новости"
-        for news_id, title, content, source in fresh_news:
-            prompt += f"Заголовок: {title}\nИсточник: {source}\nТекст: {content[:500]}\n\n"
+        # Курсор сдвигается по самой свежей новости выборки, даже если она окажется дубликатом
+        newest_id, newest_pub_date = fresh_news[0][0], fresh_news[0][4]
+        fresh_news = one_per_cluster(fresh_news)
 
-        summary = get_summary(prompt)
+        with DELIVERY_STAGE_SECONDS.labels("reduce").time():
+            summary, fresh_news = await reduce_item_summaries(fresh_news)
+        if summary is None:
+            summary, fresh_news = await generate_summary(chat_id, fresh_news)
+        else:
+            SUMMARY_PATH.labels("item_summaries").inc()
 
-        # Добавляем новости в таблицу processed_news
-        for news_id, _, _, _ in fresh_news:
-            cursor.execute(
-                "INSERT OR IGNORE INTO processed_news (news_id, processed_at) VALUES (?, ?)",
-                (news_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        # Сдвигаем курсор чата на самую свежую отправленную новость (первая строка выборки)
+        with DB_QUERY_SECONDS.labels("save_delivery_cursor").time():
+            await db.execute(
+                SAVE_DELIVERY_CURSOR_QUERY,
+                (chat_id, newest_pub_date, newest_id, datetime.now().isoformat(timespec="seconds"))
             )
-        conn.commit()
 
-        conn.close()
-        return f"📈 Экономическая сводка:\n\n{summary}\n\nСписок источников: {', '.join(set(item[3] for item in fresh_news))}"
+        sources = SOURCES_PREFIX + ', '.join(set(item[3] for item in fresh_news))
+        # Страховка на случай, если оценка символов на токен оказалась занижена
+        summary = summary[:TELEGRAM_MESSAGE_LIMIT - len(SUMMARY_HEADER) - len(sources)]
+        return f"{SUMMARY_HEADER}{summary}{sources}"
 
     except Exception as e:
         logger.error(f"Ошибка при генерации сводки новостей для чата {chat_id}: {e}")
         return "Произошла ошибка при подготовке экономической сводки. Пожалуйста, попробуйте позже."
 
+async def news_now(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обрабатывает команду /news: присылает сводку последних новостей, выводя текст по мере генерации.
+
+    Курсор доставки чата не сдвигается, рассылка по расписанию продолжается как обычно.
+    """
+    chat_id = update.effective_chat.id
+    logger.info(f"Команда /news вызвана в чате {chat_id}")
+
+    if not await check_bot_permissions(update, context):
+        return
+
+    message = ProgressiveMessage(context.bot_data["delivery_queue"], chat_id, min_interval=STREAM_EDIT_INTERVAL)
+    try:
+        latest_news, filtered = await select_fresh_news(chat_id, "", 0)
+        if not latest_news:
+            await update.message.reply_text(
+                "Нет новостей, подходящих под фильтры чата (/channels, /topics)." if filtered
+                else "В базе данных отсутствуют доступные новости."
+            )
+            return
+        await message.start("⏳ Готовлю сводку последних новостей...")
+
+        summary, latest_news = await reduce_item_summaries(one_per_cluster(latest_news))
+        if summary is None and (model_manager.is_ready or not generation_policy.adaptive):
+            prompt, used = await prompt_builder.build(latest_news)
+            cache_key = SummaryCache.make_key((item[0] for item in used), STREAM_GENERATION_PARAMS)
+            with generation_policy.select(cache_key) as path:
+                if path != PATH_EXTRACTIVE:
+                    SUMMARY_PATH.labels("stream").inc()
+                    latest_news = used
+                    summary = await summary_cache.get(cache_key)
+                    if summary is None:
+                        summary = ""
+                        async for chunk in stream_in_pool(inference_pool, get_summary_stream, prompt):
+                            summary += chunk
+                            await message.update(SUMMARY_HEADER + summary)
+                        await summary_cache.put(cache_key, summary)
+        if summary is None:
+            # Под нагрузкой и до загрузки модели сводка по запросу собирается без модели
+            summary, latest_news = await asyncio.to_thread(
+                extractive.summarize, latest_news[:DIGEST_MAX_ITEMS], DIGEST_TEXT_BUDGET, EXTRACTIVE_MAX_SENTENCES
+            )
+            SUMMARY_PATH.labels(PATH_EXTRACTIVE).inc()
+
+        sources = SOURCES_PREFIX + ', '.join(set(item[3] for item in latest_news))
+        summary = summary[:TELEGRAM_MESSAGE_LIMIT - len(SUMMARY_HEADER) - len(sources)]
+        await message.finish(f"{SUMMARY_HEADER}{summary}{sources}")
+        logger.info(f"Отправлена сводка по запросу в чат {chat_id}")
+
+    except InferenceQueueFull:
+        logger.warning(f"Очередь инференса заполнена, сводка по запросу для чата {chat_id} не подготовлена")
+        await reply_or_finish(update, message, "Сервис сводок сейчас перегружен. Пожалуйста, попробуйте позже.")
+    except Exception as e:
+        logger.error(f"Ошибка при подготовке сводки по запросу для чата {chat_id}: {e}")
+        await reply_or_finish(update, message, "Произошла ошибка при подготовке экономической сводки. Пожалуйста, попробуйте позже.")
+
+async def reply_or_finish(update: Update, message: ProgressiveMessage, text: str) -> None:
+    """Заменяет заглушку текстом ошибки, а если заглушка не отправлена — отвечает новым сообщением."""
+    try:
+        if message.message is not None:
+            await message.finish(text)
+        else:
+            await update.message.reply_text(text)
+    except Exception as e:
+        logger.error(f"Ошибка отправки сообщения в чат {update.effective_chat.id}: {e}")
+
+async def update_news_db(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обновляет базу новостей, загружая каналы параллельно без блокировки цикла событий."""
+    try:
+        stats = await update_db_async()
+        inserted = sum(result[0] for result in stats.values())
+        skipped = sum(result[1] for result in stats.values())
+        logger.info(f"База новостей обновлена: добавлено {inserted}, пропущено {skipped}")
+        if inserted:
+            await news_index.refresh(force=True)
+        if inserted and ITEM_SUMMARIES:
+            # В режиме webhook краткие сводки готовит только ведущий процесс, который загружает новости
+            item_worker.start()
+            item_worker.notify()
+    except Exception as e:
+        logger.error(f"Ошибка обновления базы новостей: {e}")
+
+async def prune_news_db(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Удаляет устаревшие новости по возрасту (отдельно от загрузки новых)."""
+    try:
+        deleted = await asyncio.to_thread(prune_db, NEWS_RETENTION_DAYS)
+        logger.info(f"Удалено устаревших новостей: {deleted}")
+    except Exception as e:
+        logger.error(f"Ошибка очистки базы новостей: {e}")
+
+async def channels_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обрабатывает команду /channels: показывает или задает каналы, из которых собираются сводки чата."""
+    chat_id = update.effective_chat.id
+    logger.info(f"Команда /channels вызвана в чате {chat_id}: {context.args}")
+
+    if not await check_bot_permissions(update, context):
+        return
+
+    if not context.args:
+        await update.message.reply_text(
+            await describe_filters(chat_id) + "\n\nДоступные каналы: " + ", ".join(CHANNELS) +
+            "\nЧтобы выбрать каналы: /channels канал1 канал2, чтобы снять ограничение: /channels all"
+        )
+        return
+
+    channels = [] if context.args == ["all"] else sorted(set(arg.lstrip("@") for arg in context.args))
+    unknown = [channel for channel in channels if channel not in CHANNELS]
+    if unknown:
+        await update.message.reply_text(
+            f"Неизвестные каналы: {', '.join(unknown)}.\nДоступные каналы: {', '.join(CHANNELS)}"
+        )
+        return
+    await chat_filters.set_channels(chat_id, channels)
+    await update.message.reply_text(await describe_filters(chat_id))
+
+async def topics_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обрабатывает команду /topics: показывает или задает ключевые слова для сводок чата."""
+    chat_id = update.effective_chat.id
+    logger.info(f"Команда /topics вызвана в чате {chat_id}: {context.args}")
+
+    if not await check_bot_permissions(update, context):
+        return
+
+    if not context.args:
+        await update.message.reply_text(
+            await describe_filters(chat_id) +
+            "\n\nЧтобы выбрать темы: /topics ключевая ставка, инфляция, чтобы снять ограничение: /topics all"
+        )
+        return
+
+    text = " ".join(context.args)
+    keywords = [] if text == "all" else sorted(set(
+        keyword.strip().lower() for keyword in text.split(",") if keyword.strip()
+    ))
+    if len(keywords) > MAX_FILTER_KEYWORDS:
+        await update.message.reply_text(f"Можно указать не больше {MAX_FILTER_KEYWORDS} тем.")
+        return
+    await chat_filters.set_keywords(chat_id, keywords)
+    await update.message.reply_text(await describe_filters(chat_id))
+
+async def describe_filters(chat_id: int) -> str:
+    """Текст с текущими фильтрами сводок чата."""
+    filters = await chat_filters.get(chat_id) or {"channels": [], "keywords": []}
+    return (
+        "Фильтры сводок в этом чате:\n"
+        f"- каналы: {', '.join(filters['channels']) or 'все'}\n"
+        f"- темы: {', '.join(filters['keywords']) or 'все'}"
+    )
+
 async def stop(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Обрабатывает команду /stop для остановки отправки новостей в текущем чате."""
     chat_id = update.effective_chat.id
@@ -402,59 +837,197 @@ async def stop(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if not await check_bot_permissions(update, context):
         return
 
-    if chat_id not in chat_schedules:
+    if await subscriptions.get(chat_id) is None:
         await update.message.reply_text("В этом чате не настроена отправка новостей.")
         logger.info(f"Попытка остановки в чате {chat_id}, но расписание не найдено")
         return
 
-    if chat_id in context.chat_data:
-        context.chat_data[chat_id].schedule_removal()
-        del context.chat_data[chat_id]
+    if await cancel_schedule(context, chat_id):
         logger.info(f"Задача отправки новостей для чата {chat_id} удалена")
 
-    del chat_schedules[chat_id]
+    await subscriptions.delete(chat_id)
     logger.info(f"Расписание для чата {chat_id} удалено")
     await update.message.reply_text(
         "Отправка новостных сводок в этом чате остановлена. Используйте /set для настройки нового расписания."
     )
 
-def main() -> None:
-    """Инициализирует и запускает бота."""
-    if not BOT_TOKEN:
-        logger.critical("BOT_TOKEN не найден в .env файле")
+async def on_startup(application: Application) -> None:
+    """Запускает прогрев модели и восстанавливает рассылки сохраненных подписок после запуска приложения."""
+    model_manager.start_warmup()
+    application.bot_data["delivery_queue"].start()
+    application.bot_data["loop_monitor"] = asyncio.create_task(monitor_event_loop())
+    if WEBHOOK_MODE:
+        # Подписки без слота получат его на ближайшем тике расписания ведущего процесса
+        application.bot_data["deliveries_in_flight"] = set()
         return
+    if ITEM_SUMMARIES:
+        item_worker.start()
+    await restore_jobs(application.job_queue, subscriptions, send_news_summary, **SCHEDULE_OPTIONS)
+
+async def on_shutdown(application: Application) -> None:
+    """Останавливает фоновую подготовку кратких сводок и очередь исходящих сообщений."""
+    application.bot_data["loop_monitor"].cancel()
+    await item_worker.stop()
+    await application.bot_data["delivery_queue"].stop()
+    if WEBHOOK_MODE:
+        await leader_lease.release()
+
+async def renew_leader_lease(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Продлевает аренду ведущего; новый ведущий сразу обновляет базу новостей."""
+    was_leader = leader_lease.is_leader
+    try:
+        if await leader_lease.renew() and not was_leader:
+            context.job_queue.run_once(update_news_db, when=0, name="leader_db_update")
+    except Exception as e:
+        logger.error(f"Ошибка продления аренды ведущего: {e}")
 
-    # Инициализируем таблицу processed_news
-    init_processed_news_table()
-
-    application = Application.builder().token(BOT_TOKEN).build()
+def leader_only(callback):
+    """Оборачивает задачу JobQueue так, что она выполняется только в ведущем процессе."""
+    async def run_if_leader(context: ContextTypes.DEFAULT_TYPE) -> None:
+        if leader_lease.is_leader:
+            await callback(context)
+    return run_if_leader
 
-    global db_job_queue
-    db_job_queue = JobQueue()
-    db_job_queue.set_application(application)
+async def schedule_tick(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Переносит наступившие слоты подписок в очередь доставки (ведущий процесс)."""
+    try:
+        await db_schedule.tick()
+    except Exception as e:
+        logger.error(f"Ошибка тика расписания: {e}")
 
-    db_job_queue.run_once(
-        callback=lambda context: update_db(),
-        when=0,
-        name="initial_db_update"
+async def claim_deliveries(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Забирает задачи доставки из общей очереди в пределах свободных слотов процесса."""
+    in_flight = context.bot_data["deliveries_in_flight"]
+    free = DELIVERY_CLAIM_LIMIT - len(in_flight)
+    if free <= 0:
+        return
+    try:
+        jobs = await db_schedule.claim(WORKER_ID, free, lease=INFERENCE_TIMEOUT + 60)
+    except Exception as e:
+        logger.error(f"Ошибка получения задач доставки: {e}")
+        return
+    for job_id, chat_id in jobs:
+        task = asyncio.create_task(run_delivery_job(context, job_id, chat_id))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+async def run_delivery_job(context: ContextTypes.DEFAULT_TYPE, job_id: int, chat_id: int) -> None:
+    await deliver_news_summary(context, chat_id)
+    await db_schedule.complete(job_id)
+
+def build_application() -> Application:
+    """Создает приложение бота с обработчиками и фоновыми задачами для текущего режима."""
+    builder = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .base_url(BOT_API_URL)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
     )
-    db_job_queue.run_repeating(
-        callback=lambda context: update_db(),
+    if WEBHOOK_MODE:
+        # Обновления приходят через собственный HTTP-сервер webhook
+        builder = builder.updater(None)
+    application = builder.build()
+    application.bot_data["delivery_queue"] = DeliveryQueue(application.bot, **DELIVERY_OPTIONS)
+
+    job_queue = application.job_queue
+    if WEBHOOK_MODE:
+        # Загрузку новостей и расписание ведет только ведущий процесс, доставку — все процессы
+        job_queue.run_repeating(renew_leader_lease, interval=LEADER_LEASE_TTL / 3, first=0, name="leader_lease")
+        job_queue.run_repeating(leader_only(schedule_tick), interval=SCHEDULE_TICK, first=SCHEDULE_TICK, name="schedule_tick")
+        job_queue.run_repeating(claim_deliveries, interval=DELIVERY_POLL_INTERVAL, first=DELIVERY_POLL_INTERVAL, name="claim_deliveries")
+    else:
+        job_queue.run_once(
+            callback=update_news_db,
+            when=0,
+            name="initial_db_update"
+        )
+    # Сбор новостей выполняется асинхронно в общей очереди задач приложения
+    job_queue.run_repeating(
+        callback=leader_only(update_news_db) if WEBHOOK_MODE else update_news_db,
         interval=600,
         first=600,
         name="periodic_db_update"
     )
-    db_job_queue.start()
+    job_queue.run_repeating(
+        callback=leader_only(prune_news_db) if WEBHOOK_MODE else prune_news_db,
+        interval=3600,
+        first=3600,
+        name="periodic_db_prune"
+    )
 
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("set", set_schedule))
     application.add_handler(CommandHandler("stop", stop))
+    application.add_handler(CommandHandler("news", news_now))
+    application.add_handler(CommandHandler("channels", channels_command))
+    application.add_handler(CommandHandler("topics", topics_command))
     application.add_handler(CallbackQueryHandler(handle_periodicity_choice))
+    application.add_handler(ChatMemberHandler(member_cache.track_updates, ChatMemberHandler.ANY_CHAT_MEMBER))
     application.add_handler(MessageHandler(filters.Regex(r'^\d+$'), handle_custom_periodicity))
+    return application
+
+def run_webhook_process(index: int) -> None:
+    """Процесс бота в режиме webhook: принимает обновления на общем порту и доставляет сводки."""
+    inference_pool.start()
+    if METRICS_PORT:
+        # Каждый процесс отдает метрики на своем порту
+        start_metrics_server(METRICS_PORT + index, METRICS_ADDR)
+    logger.info(f"Процесс бота {index} ({WORKER_ID}) запущен")
+    try:
+        asyncio.run(run_webhook_worker(
+            build_application(), WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET
+        ))
+    finally:
+        inference_pool.shutdown(wait=False)
+        db.close()
+
+def main() -> None:
+    """Инициализирует и запускает бота."""
+    if not BOT_TOKEN:
+        logger.critical("BOT_TOKEN не найден в .env файле")
+        return
+
+    if WEBHOOK_MODE:
+        if not WEBHOOK_URL:
+            logger.critical("Для режима webhook задайте WEBHOOK_URL")
+            return
+        asyncio.run(register_webhook(BOT_TOKEN, BOT_API_URL, WEBHOOK_URL, WEBHOOK_SECRET))
+        logger.info(f"----------------------- Бот запущен (webhook, процессов: {WEBHOOK_WORKERS}) -----------------------")
+        if WEBHOOK_WORKERS == 1:
+            run_webhook_process(0)
+            return
+        # Процессы запускаются через spawn: каждый заново загружает модель и открывает свои соединения
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=run_webhook_process, args=(index,), name=f"bot-worker-{index}")
+            for index in range(WEBHOOK_WORKERS)
+        ]
+        for process in processes:
+            process.start()
+        # SIGTERM родителю превращается в SystemExit, чтобы блок finally остановил дочерние процессы
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            for process in processes:
+                process.join()
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+        return
+
+    application = build_application()
+    inference_pool.start()
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT, METRICS_ADDR)
 
     logger.info("----------------------- Бот запущен -----------------------")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    try:
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
+    finally:
+        inference_pool.shutdown(wait=False)
+        db.close()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,81 @@
+import logging
+import os
+import socket
+import time
+from datetime import datetime
+from typing import Optional
+
+from database.db import Database
+
+logger = logging.getLogger(__name__)
+
+
+def worker_id() -> str:
+    """Идентификатор процесса бота, уникальный в пределах узлов с общей базой."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderLease:
+    """Выбор ведущего процесса через аренду в таблице leases.
+
+    Аренду продлевает только ее владелец; если он не продлил ее за ttl секунд
+    (процесс упал или завис), аренду забирает первый обратившийся процесс.
+    """
+
+    def __init__(self, db: Database, owner: str, name: str = "leader", ttl: float = 30):
+        self.db = db
+        self.owner = owner
+        self.name = name
+        self.ttl = ttl
+        self._expires_at = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        return self._expires_at > time.time()
+
+    async def renew(self) -> bool:
+        """Захватывает или продлевает аренду; возвращает True, если процесс ведущий."""
+        was_leader = self.is_leader
+        now = time.time()
+        acquired = await self.db.execute(
+            """
+            INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+            WHERE leases.owner = excluded.owner OR leases.expires_at < ?
+            """,
+            (self.name, self.owner, now + self.ttl, now)
+        ) > 0
+        self._expires_at = now + self.ttl if acquired else 0.0
+        if acquired != was_leader:
+            logger.info(f"Процесс {self.owner} {'стал' if acquired else 'больше не'} ведущим")
+        return acquired
+
+    async def release(self) -> None:
+        if self.is_leader:
+            await self.db.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (self.name, self.owner))
+            self._expires_at = 0.0
+
+
+class InputStateStore:
+    """Состояние ожидания ввода пользователя в чате (например, числа минут) в таблице input_states.
+
+    Хранится в базе, чтобы следующее сообщение пользователя мог обработать любой процесс бота.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def get(self, chat_id: int, user_id: int) -> Optional[str]:
+        row = await self.db.fetchone(
+            "SELECT state FROM input_states WHERE chat_id = ? AND user_id = ?", (chat_id, user_id)
+        )
+        return row[0] if row else None
+
+    async def set(self, chat_id: int, user_id: int, state: str) -> None:
+        await self.db.execute(
+            "INSERT OR REPLACE INTO input_states (chat_id, user_id, state, updated_at) VALUES (?, ?, ?, ?)",
+            (chat_id, user_id, state, datetime.now().isoformat(timespec="seconds"))
+        )
+
+    async def clear(self, chat_id: int, user_id: int) -> None:
+        await self.db.execute("DELETE FROM input_states WHERE chat_id = ? AND user_id = ?", (chat_id, user_id))
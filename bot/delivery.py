@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+from monitoring.metrics import SEND_ERRORS, SEND_SECONDS
+from prompt_builder import TELEGRAM_MESSAGE_LIMIT
+
+logger = logging.getLogger(__name__)
+
+
+def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """Делит текст на части не длиннее limit, по возможности по границе абзаца, строки или слова."""
+    parts = []
+    while len(text) > limit:
+        cut = -1
+        for separator in ("\n\n", "\n", " "):
+            cut = text.rfind(separator, 0, limit)
+            if cut > 0:
+                break
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text or not parts:
+        parts.append(text)
+    return parts
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """Пауза из RetryAfter в секундах: в PTB 22 retry_after может быть timedelta."""
+    retry_after = error.retry_after
+    if hasattr(retry_after, "total_seconds"):
+        retry_after = retry_after.total_seconds()
+    return retry_after
+
+
+class RateLimiter:
+    """Ограничение частоты: не более rate событий в секунду с запасом burst."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1.0 / rate
+        self.burst = max(1, burst)
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            # Допускаем не больше burst событий подряд без паузы
+            start = max(self._next, now - (self.burst - 1) * self.interval)
+            self._next = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+
+    def pause(self, seconds: float) -> None:
+        """Откладывает следующие события (например, после RetryAfter)."""
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+class DeliveryQueue:
+    """Очередь исходящих сообщений с ограничениями Telegram.
+
+    Соблюдает общий лимит (~30 сообщений в секунду) и лимиты чатов: в личный чат
+    не чаще раза в секунду, в группу или канал — 20 сообщений в минуту. Сообщения
+    одного чата отправляются по порядку. RetryAfter выдерживается, сетевые ошибки
+    повторяются с экспоненциальной задержкой, длинный текст делится на части.
+    """
+
+    def __init__(self, bot, global_rate: float = 30, private_interval: float = 1.0,
+                 group_interval: float = 3.0, workers: int = 8, retries: int = 5,
+                 backoff: float = 1.0, max_queue: int = 10000):
+        self.bot = bot
+        self.private_interval = private_interval
+        self.group_interval = group_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.workers = max(1, workers)
+        self._global = RateLimiter(global_rate, burst=int(global_rate))
+        self._chat_limits: Dict[int, RateLimiter] = {}
+        self._chat_locks: Dict[int, asyncio.Lock] = {}
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._tasks = []
+
+    def start(self) -> None:
+        """Запускает рабочие задачи отправки (повторный вызов ничего не делает)."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    async def acquire(self, chat_id: int) -> None:
+        """Ждет лимита чата и общего лимита перед запросом в обход очереди (например, правкой сообщения)."""
+        await self._chat_limit(chat_id).acquire()
+        await self._global.acquire()
+
+    def pause(self, chat_id: int, seconds: float) -> None:
+        """Откладывает сообщения чата после RetryAfter, полученного в обход очереди."""
+        self._chat_limit(chat_id).pause(seconds)
+
+    async def send(self, chat_id: int, text: str, **kwargs) -> list:
+        """Ставит сообщение в очередь и ожидает отправки всех его частей.
+
+        Возвращает отправленные сообщения. Forbidden и BadRequest передаются вызывающему
+        без повторов, после исчерпания попыток — последняя ошибка.
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((chat_id, text, kwargs, future))
+        return await future
+
+    async def _worker(self) -> None:
+        while True:
+            chat_id, text, kwargs, future = await self._queue.get()
+            try:
+                if not future.cancelled():
+                    future.set_result(await self._deliver(chat_id, text, kwargs))
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, chat_id: int, text: str, kwargs: dict) -> list:
+        # Части одного сообщения и сообщения одного чата уходят строго по порядку
+        async with self._chat_locks.setdefault(chat_id, asyncio.Lock()):
+            return [await self._send_part(chat_id, part, kwargs) for part in split_message(text)]
+
+    def _chat_limit(self, chat_id: int) -> RateLimiter:
+        limiter = self._chat_limits.get(chat_id)
+        if limiter is None:
+            # Отрицательные id принадлежат группам и каналам
+            interval = self.group_interval if chat_id < 0 else self.private_interval
+            limiter = self._chat_limits[chat_id] = RateLimiter(1.0 / interval)
+        return limiter
+
+    async def _send_part(self, chat_id: int, text: str, kwargs: dict):
+        chat_limit = self._chat_limit(chat_id)
+        attempt = 0
+        while True:
+            await chat_limit.acquire()
+            await self._global.acquire()
+            try:
+                with SEND_SECONDS.time():
+                    return await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            except RetryAfter as e:
+                SEND_ERRORS.labels("RetryAfter").inc()
+                retry_after = retry_after_seconds(e)
+                logger.warning(f"Ограничение частоты Telegram для чата {chat_id}: повтор через {retry_after} с")
+                chat_limit.pause(retry_after)
+            except (Forbidden, BadRequest) as e:
+                SEND_ERRORS.labels(type(e).__name__).inc()
+                raise
+            except (TimedOut, NetworkError) as e:
+                SEND_ERRORS.labels(type(e).__name__).inc()
+                attempt += 1
+                if attempt > self.retries:
+                    raise
+                delay = self.backoff * 2 ** (attempt - 1)
+                logger.warning(f"Ошибка отправки в чат {chat_id} ({e}), попытка {attempt} через {delay} с")
+                await asyncio.sleep(delay)
@@ -0,0 +1,99 @@
+import html
+import re
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from news_filters import stem
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+|\n+")
+_TOKEN_RE = re.compile(r"\w+")
+# Основы слов повторяются от сводки к сводке
+_stem = lru_cache(maxsize=65536)(stem)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Делит текст новости (с HTML-разметкой ленты) на предложения."""
+    text = html.unescape(_TAG_RE.sub(" ", text))
+    sentences = (" ".join(sentence.split()) for sentence in _SENTENCE_RE.split(text))
+    # Обрывки вроде подписей к фото и ссылок не годятся для сводки
+    return [sentence for sentence in sentences if len(_TOKEN_RE.findall(sentence)) >= 4]
+
+
+def tfidf_matrix(sentences: Sequence[str]) -> np.ndarray:
+    """Нормированные по строкам векторы TF-IDF предложений (слова приводятся к основе)."""
+    vocabulary, rows, cols = {}, [], []
+    for row, sentence in enumerate(sentences):
+        for token in _TOKEN_RE.findall(sentence):
+            rows.append(row)
+            cols.append(vocabulary.setdefault(_stem(token), len(vocabulary)))
+    counts = np.zeros((len(sentences), len(vocabulary)), dtype=np.float32)
+    np.add.at(counts, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1.0)
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    weights = counts * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return weights / np.maximum(norms, 1e-9)
+
+
+def textrank(similarity: np.ndarray, damping: float = 0.85, iterations: int = 50, tolerance: float = 1e-6) -> np.ndarray:
+    """Оценки предложений по TextRank: стационарное распределение случайного блуждания по графу сходства."""
+    count = similarity.shape[0]
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0.0)
+    out_weight = weights.sum(axis=1, keepdims=True)
+    # Из изолированного предложения блуждание переходит в любое равновероятно
+    transition = np.where(out_weight > 0, weights / np.maximum(out_weight, 1e-9), 1.0 / count)
+    scores = np.full(count, 1.0 / count)
+    for _ in range(iterations):
+        updated = (1 - damping) / count + damping * transition.T @ scores
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+
+def summarize(items: Sequence, max_chars: int, max_sentences: int = 5, sentences_per_item: int = 6,
+              lead_bonus: float = 0.5, redundancy: float = 0.5) -> Tuple[str, List]:
+    """Собирает сводку из ключевых предложений новостей без модели.
+
+    items — строки (id, title, content, channel, ...), от новых к старым. Из каждой
+    новости берутся первые sentences_per_item предложений, чтобы длинные посты не
+    раздували матрицу сходства. Предложения ранжируются по TextRank на косинусном
+    сходстве TF-IDF, первое предложение каждой новости получает надбавку lead_bonus.
+    Предложения, похожие на уже выбранные сильнее redundancy, пропускаются. Возвращает текст в формате кратких сводок
+    («• предложение» по строкам, в порядке новостей) и новости, вошедшие в него.
+    Если предложений нет, каждая новость представлена своим заголовком.
+    """
+    sentences, owners, leads = [], [], []
+    for index, item in enumerate(items):
+        for position, sentence in enumerate(split_sentences(item[2] or "")[:sentences_per_item]):
+            sentences.append(sentence)
+            owners.append(index)
+            leads.append(position == 0)
+    if not sentences:
+        lines = [f"• {html.unescape(_TAG_RE.sub('', item[1]))}" for item in items[:max_sentences]]
+        return "\n".join(lines)[:max_chars], list(items[:max_sentences])
+
+    vectors = tfidf_matrix(sentences)
+    similarity = vectors @ vectors.T
+    scores = textrank(similarity) * np.where(leads, 1 + lead_bonus, 1.0)
+
+    chosen, length = [], 0
+    for candidate in np.argsort(-scores):
+        if len(chosen) >= max_sentences:
+            break
+        if chosen and similarity[candidate, chosen].max() > redundancy:
+            continue
+        line_length = len(sentences[candidate]) + 3
+        if chosen and length + line_length > max_chars:
+            continue
+        chosen.append(int(candidate))
+        length += line_length
+    # Порядок вывода — порядок новостей (свежие первыми) и предложений в них
+    chosen.sort()
+    used = sorted({owners[index] for index in chosen})
+    text = "\n".join(f"• {sentences[index]}" for index in chosen)
+    return text[:max_chars], [items[index] for index in used]
@@ -0,0 +1,103 @@
+import logging
+import math
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from inference import InferencePool
+
+logger = logging.getLogger(__name__)
+
+# Способы подготовки сводки от лучшего качества к самому дешевому
+PATH_BEAM = "beam"
+PATH_GREEDY = "greedy"
+PATH_EXTRACTIVE = "extractive"
+PATHS = (PATH_BEAM, PATH_GREEDY, PATH_EXTRACTIVE)
+
+
+class GenerationPolicy:
+    """Выбирает способ подготовки сводки по загрузке пула инференса.
+
+    Для beam search и жадного поиска хранится скользящее среднее (EWMA) времени
+    генерации пакета в потоке пула. Ожидаемая задержка новой сводки оценивается как
+    это время, умноженное на число пакетов перед ней. Выбирается лучший способ,
+    который укладывается в slo секунд. Кроме оценки задержки действуют пороги
+    глубины очереди: с greedy_depth пакетов beam search не используется, с
+    extractive_depth сводка собирается извлечением предложений без модели.
+
+    Глубина считается не только по очереди пула, но и по сводкам, уже отправленным
+    на генерацию через select (по batch_size в пакете): при одновременной рассылке
+    многим чатам промпты еще собираются, а очередь пула пока пуста. Сводки учитываются
+    по ключу набора новостей: чаты с одним набором ждут одну генерацию, получают тот же
+    способ и глубину не увеличивают.
+    """
+
+    def __init__(self, pool: InferencePool, slo: float = 120, greedy_depth: int = 2,
+                 extractive_depth: int = 6, batch_size: int = 8, alpha: float = 0.3, adaptive: bool = True):
+        self.pool = pool
+        self.batch_size = max(1, batch_size)
+        self.slo = slo
+        self.greedy_depth = greedy_depth
+        self.extractive_depth = extractive_depth
+        self.alpha = alpha
+        self.adaptive = adaptive
+        self._service_time = {PATH_BEAM: None, PATH_GREEDY: None}
+        self._lock = threading.Lock()
+        self._last_path = PATH_BEAM
+        self._pending = {}  # ключ набора новостей -> [способ, число ожидающих]
+
+    def record(self, path: str, seconds: float) -> None:
+        """Учитывает время генерации пакета способом path (вызывается из потоков пула)."""
+        with self._lock:
+            previous = self._service_time[path]
+            self._service_time[path] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+
+    def estimate(self, path: str, depth: int) -> Optional[float]:
+        """Ожидаемое время до готовности сводки при depth задачах в очереди пула."""
+        service_time = self._service_time[path]
+        if service_time is None:
+            return None
+        return service_time * (depth / self.pool.workers + 1)
+
+    @contextmanager
+    def select(self, key: str) -> Iterator[str]:
+        """Выбирает способ подготовки сводки набора новостей key и учитывает ее в глубине очереди до выхода из блока."""
+        entry = self._pending.get(key)
+        if entry is None:
+            path = self.choose()
+            if path == PATH_EXTRACTIVE:
+                yield path
+                return
+            entry = self._pending[key] = [path, 0]
+        entry[1] += 1
+        try:
+            yield entry[0]
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._pending[key]
+
+    def depth(self) -> int:
+        """Число пакетов генерации, ожидающих пул инференса."""
+        return max(self.pool.qsize(), math.ceil(len(self._pending) / self.batch_size))
+
+    def choose(self) -> str:
+        """Возвращает способ подготовки очередной сводки."""
+        if not self.adaptive:
+            return PATH_BEAM
+        depth = self.depth()
+        if depth >= self.extractive_depth:
+            path = PATH_EXTRACTIVE
+        else:
+            path = PATH_EXTRACTIVE
+            for candidate in (PATH_BEAM, PATH_GREEDY):
+                if candidate == PATH_BEAM and depth >= self.greedy_depth:
+                    continue
+                estimate = self.estimate(candidate, depth)
+                if estimate is None or estimate <= self.slo:
+                    path = candidate
+                    break
+        if path != self._last_path:
+            logger.info(f"Способ подготовки сводок: {self._last_path} -> {path} (пакетов в очереди инференса: {depth})")
+            self._last_path = path
+        return path
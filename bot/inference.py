@@ -0,0 +1,107 @@
+import asyncio
+import itertools
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты задач: меньшее значение выполняется раньше
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 10
+
+
+class InferenceQueueFull(Exception):
+    """Очередь задач инференса переполнена."""
+
+
+class InferencePool:
+    """Пул рабочих потоков для тяжелых вызовов модели вне цикла событий.
+
+    Задачи попадают в ограниченную очередь с приоритетами и выполняются
+    фиксированным числом потоков: фоновые задачи (PRIORITY_LOW) уступают
+    доставке сводок. Корутина, отправившая задачу, ждет результат не дольше таймаута.
+    """
+
+    def __init__(self, workers: int = 1, max_queue: int = 8, timeout: float = 300.0):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self._queue = queue.PriorityQueue(maxsize=max(1, max_queue))
+        self._sequence = itertools.count()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def start(self) -> None:
+        """Запускает рабочие потоки (повторный вызов ничего не делает)."""
+        with self._lock:
+            if self._threads or self._stopped:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker, name=f"inference-{index}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            logger.info(f"Пул инференса запущен: потоков {self.workers}, очередь {self._queue.maxsize}")
+
+    def qsize(self) -> int:
+        """Возвращает число задач, ожидающих свободного потока."""
+        return self._queue.qsize()
+
+    def submit(self, func: Callable, *args, priority: int = PRIORITY_HIGH, **kwargs) -> Future:
+        """Ставит задачу в очередь и возвращает concurrent.futures.Future."""
+        if self._stopped:
+            raise RuntimeError("Пул инференса остановлен")
+        self.start()
+        future = Future()
+        try:
+            self._queue.put_nowait((priority, next(self._sequence), (future, func, args, kwargs)))
+        except queue.Full:
+            raise InferenceQueueFull(
+                f"Очередь инференса заполнена ({self._queue.maxsize} задач)"
+            ) from None
+        return future
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None,
+                  priority: int = PRIORITY_HIGH, **kwargs) -> Any:
+        """Выполняет func в пуле и ожидает результат с таймаутом."""
+        future = self.submit(func, *args, priority=priority, **kwargs)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout or self.timeout
+            )
+        except asyncio.TimeoutError:
+            # Если задача еще не начала выполняться, она будет пропущена потоком
+            future.cancel()
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Останавливает рабочие потоки после завершения текущих задач."""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            threads = list(self._threads)
+        for _ in threads:
+            # Сигнал остановки обрабатывается после всех задач, уже стоящих в очереди
+            self._queue.put((float("inf"), next(self._sequence), None))
+        if wait:
+            for thread in threads:
+                thread.join()
+        logger.info("Пул инференса остановлен")
+
+    def _worker(self) -> None:
+        while True:
+            _, _, task = self._queue.get()
+            if task is None:
+                break
+            future, func, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, List
+
+from database.db import Database
+from inference import InferencePool, InferenceQueueFull, PRIORITY_LOW
+from prompt_builder import PromptBuilder
+
+logger = logging.getLogger(__name__)
+
+ITEM_PROMPT_HEADER = "Кратко перескажи новость:\n\n"
+
+PENDING_NEWS_QUERY = """
+    SELECT n.id, n.title, n.content, n.channel, n.pub_date
+    FROM news AS n
+    LEFT JOIN news_summaries AS s ON s.news_id = n.id
+    WHERE n.pub_date >= ? AND s.news_id IS NULL
+    ORDER BY n.pub_date DESC
+    LIMIT ?
+"""
+
+
+class ItemSummaryWorker:
+    """Фоновая стадия после загрузки новостей: краткая сводка каждой новой новости.
+
+    Сводки сохраняются в news_summaries один раз на новость; генерация идет в пуле
+    инференса с низким приоритетом и не задерживает доставку сводок чатам.
+    """
+
+    def __init__(self, db: Database, pool: InferencePool, prompt_builder: PromptBuilder,
+                 summarize: Callable[[List[str]], List[str]], batch_size: int = 4,
+                 max_age_hours: float = 48):
+        self.db = db
+        self.pool = pool
+        self.prompt_builder = prompt_builder
+        self._summarize = summarize
+        self.batch_size = max(1, batch_size)
+        self.max_age_hours = max_age_hours
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def start(self) -> None:
+        """Запускает фоновую задачу и сразу обрабатывает накопившиеся новости."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            self._wakeup.set()
+
+    def notify(self) -> None:
+        """Сообщает, что в базе появились новые новости."""
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                done = await self._drain()
+                if done:
+                    logger.info(f"Подготовлено кратких сводок новостей: {done}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка подготовки кратких сводок новостей: {e}")
+
+    async def _drain(self) -> int:
+        done = 0
+        since = datetime.fromtimestamp(datetime.now().timestamp() - self.max_age_hours * 3600)
+        while True:
+            items = await self.db.fetchall(
+                PENDING_NEWS_QUERY, (since.isoformat(timespec="seconds"), self.batch_size)
+            )
+            if not items:
+                return done
+            tokenized = await self.prompt_builder.tokenize(items)
+            prompts = [ITEM_PROMPT_HEADER + tokenized[item[0]][0] for item in items]
+            try:
+                summaries = await self.pool.run(self._summarize, prompts, priority=PRIORITY_LOW)
+            except InferenceQueueFull:
+                # Очередь занята доставкой: вернемся при следующем обновлении базы
+                logger.info("Очередь инференса занята, подготовка кратких сводок отложена")
+                return done
+            created_at = datetime.now().isoformat(timespec="seconds")
+            await self.db.executemany(
+                "INSERT OR REPLACE INTO news_summaries (news_id, summary, created_at) VALUES (?, ?, ?)",
+                [(item[0], summary.strip(), created_at) for item, summary in zip(items, summaries)]
+            )
+            done += len(items)
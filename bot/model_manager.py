@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModelState:
+    NOT_LOADED = "not_loaded"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class ModelManager:
+    """Ленивая загрузка бэкенда инференса с прогревом в фоновом потоке.
+
+    Импорт модуля бота не загружает ни torch, ни веса модели: загрузка начинается
+    в start_warmup() после запуска бота или при первом обращении к get_backend().
+    """
+
+    def __init__(self, backend_name: str, num_threads: Optional[int] = None):
+        self.backend_name = backend_name
+        self.num_threads = num_threads
+        self.state = ModelState.NOT_LOADED
+        self.error = None
+        self.load_seconds = None
+        self._backend = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == ModelState.READY
+
+    def start_warmup(self) -> None:
+        """Запускает загрузку модели в фоновом потоке (повторный вызов ничего не делает)."""
+        with self._lock:
+            if self.state != ModelState.NOT_LOADED:
+                return
+            self.state = ModelState.LOADING
+        threading.Thread(target=self._load, name="model-warmup", daemon=True).start()
+
+    def get_backend(self):
+        """Возвращает загруженный бэкенд, дожидаясь окончания загрузки (вызывается вне цикла событий)."""
+        with self._lock:
+            start_here = self.state == ModelState.NOT_LOADED
+            if start_here:
+                self.state = ModelState.LOADING
+        if start_here:
+            self._load()
+        self._ready.wait()
+        if self.state == ModelState.FAILED:
+            raise RuntimeError(f"Модель не загружена: {self.error}")
+        return self._backend
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Ожидает готовности модели, не блокируя цикл событий."""
+        return await asyncio.to_thread(self._ready.wait, timeout)
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        logger.info(f"Загрузка бэкенда инференса {self.backend_name}")
+        try:
+            if self.backend_name == "stub":
+                # Заглушка для нагрузочных тестов работает без torch
+                from stub_backend import StubBackend
+                backend = StubBackend()
+            else:
+                # torch и transformers импортируются только здесь, чтобы не замедлять запуск бота
+                import torch
+                from backends import create_backend
+
+                if self.num_threads:
+                    torch.set_num_threads(self.num_threads)
+                backend = create_backend(self.backend_name)
+            backend.load()
+        except Exception as e:
+            self.error = e
+            self.state = ModelState.FAILED
+            logger.error(f"Ошибка загрузки модели: {e}")
+        else:
+            self._backend = backend
+            self.load_seconds = time.perf_counter() - started
+            self.state = ModelState.READY
+            logger.info(f"Модель готова за {self.load_seconds:.1f} с")
+        finally:
+            self._ready.set()
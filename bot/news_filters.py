@@ -0,0 +1,101 @@
+import re
+from typing import List, Optional, Tuple
+
+from database.db import Database
+
+KIND_CHANNEL = "channel"
+KIND_KEYWORD = "keyword"
+
+_WORD_RE = re.compile(r"\w+")
+# Частые окончания русских слов: «ключевая ставка» должна находить «ключевую ставку»
+_ENDING_RE = re.compile(r"(?:ами|ями|ого|его|ому|ему|ыми|ими|ая|яя|ую|юю|ой|ей|ые|ие|ых|их|ый|ий|ое|ее|ам|ям|ах|ях|ов|ев|ом|ем|[аеиоуыьюя])$")
+
+_NEWS_COLUMNS = "n.id, n.title, n.content, n.channel, n.pub_date, n.cluster_id"
+
+
+def stem(word: str) -> str:
+    """Отбрасывает окончание слова, оставляя основу не короче 3 букв."""
+    word = word.lower()
+    match = _ENDING_RE.search(word)
+    if match and match.start() >= 3:
+        return word[:match.start()]
+    return word
+
+
+def match_expression(keywords: List[str]) -> str:
+    """Запрос FTS5 MATCH: любая из фраз, каждое слово фразы ищется по основе как префикс."""
+    phrases = []
+    for keyword in keywords:
+        words = [stem(word) for word in _WORD_RE.findall(keyword)]
+        if words:
+            phrases.append(" + ".join(f'"{word}"*' for word in words))
+    return " OR ".join(phrases)
+
+
+def fresh_news_query(channels: List[str], keywords: List[str]) -> Tuple[str, list]:
+    """SQL выборки новостей после курсора чата с учетом фильтров и параметры фильтров.
+
+    Параметры курсора и лимит (pub_date, pub_date, id, limit) передаются после
+    возвращенных параметров фильтров. С ключевыми словами выборка идет от индекса
+    news_fts (MATCH) с соединением по первичному ключу news, с одними каналами —
+    по индексу idx_news_channel_pub_date.
+    """
+    params, conditions = [], []
+    expression = match_expression(keywords)
+    if expression:
+        source = "news_fts JOIN news AS n ON n.id = news_fts.rowid"
+        conditions.append("news_fts MATCH ?")
+        params.append(expression)
+    else:
+        source = "news AS n"
+    if channels:
+        conditions.append(f"n.channel IN ({', '.join('?' * len(channels))})")
+        params.extend(channels)
+    conditions.append("n.pub_date >= ? AND (n.pub_date > ? OR n.id > ?)")
+    sql = f"""
+        SELECT {_NEWS_COLUMNS}
+        FROM {source}
+        WHERE {' AND '.join(conditions)}
+        ORDER BY n.pub_date DESC, n.id DESC
+        LIMIT ?
+    """
+    return sql, params
+
+
+class ChatFilterStore:
+    """Фильтры сводок чатов по каналам и ключевым словам в таблице chat_filters."""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def get(self, chat_id: int) -> Optional[dict]:
+        """Возвращает {"channels": [...], "keywords": [...]} или None, если фильтров нет."""
+        rows = await self.db.fetchall(
+            "SELECT kind, value FROM chat_filters WHERE chat_id = ? ORDER BY kind, value", (chat_id,)
+        )
+        if not rows:
+            return None
+        return {
+            "channels": [row[1] for row in rows if row[0] == KIND_CHANNEL],
+            "keywords": [row[1] for row in rows if row[0] == KIND_KEYWORD],
+        }
+
+    async def set_channels(self, chat_id: int, channels: List[str]) -> None:
+        await self._replace(chat_id, KIND_CHANNEL, channels)
+
+    async def set_keywords(self, chat_id: int, keywords: List[str]) -> None:
+        await self._replace(chat_id, KIND_KEYWORD, keywords)
+
+    async def clear(self, chat_id: int) -> None:
+        await self.db.execute("DELETE FROM chat_filters WHERE chat_id = ?", (chat_id,))
+
+    async def _replace(self, chat_id: int, kind: str, values: List[str]) -> None:
+        await self.db.run(self._replace_rows, chat_id, kind, values)
+
+    def _replace_rows(self, conn, chat_id: int, kind: str, values: List[str]) -> None:
+        with conn:
+            conn.execute("DELETE FROM chat_filters WHERE chat_id = ? AND kind = ?", (chat_id, kind))
+            conn.executemany(
+                "INSERT OR IGNORE INTO chat_filters (chat_id, kind, value) VALUES (?, ?, ?)",
+                [(chat_id, kind, value) for value in values]
+            )
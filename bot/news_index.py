@@ -0,0 +1,132 @@
+import asyncio
+import bisect
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, NamedTuple, Optional
+
+from database.db import Database
+from monitoring.metrics import DB_QUERY_SECONDS, NEWS_INDEX_SIZE
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = "id, title, content, channel, pub_date, cluster_id"
+LOAD_QUERY = f"SELECT {_COLUMNS} FROM news WHERE pub_date >= ? ORDER BY pub_date DESC, id DESC LIMIT ?"
+NEW_ROWS_QUERY = f"SELECT {_COLUMNS} FROM news WHERE id > ? AND pub_date >= ?"
+
+
+class NewsRecord(NamedTuple):
+    """Новость в индексе; поля в порядке столбцов выборки свежих новостей (FRESH_NEWS_QUERY)."""
+    id: int
+    title: str
+    content: str
+    channel: str
+    pub_date: str
+    cluster_id: Optional[int]
+
+
+class HotNewsIndex:
+    """Свежие новости за последние max_age_hours часов в памяти процесса, общие для всех доставок.
+
+    Записи лежат по возрастанию ключа (pub_date, id), как курсоры доставки чатов,
+    поэтому выборка после курсора — двоичный поиск и проход от конца списка без
+    запроса к базе. Индекс дополняется новостями с id больше последнего загруженного:
+    сразу после загрузки лент (refresh(force=True)) или не чаще раза в
+    refresh_interval секунд (процессы, которые сами ленты не загружают). Размер
+    ограничен max_items записями и возрастом: старые записи вытесняются.
+
+    Граница _floor — ключ, выше которого в индексе есть все новости базы. Если после
+    курсора чата новостей меньше лимита, а курсор ниже границы, индекс не может
+    ответить полностью, и выборка идет в базу.
+    """
+
+    def __init__(self, db: Database, max_items: int = 5000, max_age_hours: float = 24, refresh_interval: float = 30):
+        self.db = db
+        self.max_items = max(1, max_items)
+        self.max_age = timedelta(hours=max_age_hours)
+        self.refresh_interval = refresh_interval
+        self._keys = []  # (pub_date, id) по возрастанию
+        self._records = []  # NewsRecord в том же порядке
+        self._floor = None  # None — индекс еще не загружен
+        self._max_id = 0
+        self._refreshed_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    async def refresh(self, force: bool = False) -> None:
+        """Догружает новые новости из базы и вытесняет устаревшие."""
+        if not force and time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        async with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.refresh_interval:
+                return
+            cutoff = (datetime.now() - self.max_age).isoformat()
+            with DB_QUERY_SECONDS.labels("news_index_refresh").time():
+                if self._floor is None:
+                    rows = await self.db.fetchall(LOAD_QUERY, (cutoff, self.max_items))
+                else:
+                    rows = await self.db.fetchall(NEW_ROWS_QUERY, (self._max_id, cutoff))
+            if self._floor is None:
+                self._load(rows, cutoff)
+            else:
+                self._insert(rows)
+            self._evict(cutoff)
+            self._refreshed_at = time.monotonic()
+            NEWS_INDEX_SIZE.set(len(self._records))
+
+    def select(self, last_pub_date: str, last_news_id: int, limit: int,
+               channels: Iterable[str] = None) -> Optional[List[NewsRecord]]:
+        """Новости после курсора (pub_date, id) от новых к старым, не больше limit.
+
+        Возвращает None, если индекс не может ответить без базы.
+        """
+        if self._floor is None:
+            return None
+        channels = set(channels) if channels else None
+        cursor = (last_pub_date, last_news_id)
+        start = bisect.bisect_right(self._keys, cursor)
+        result = []
+        for index in range(len(self._records) - 1, start - 1, -1):
+            record = self._records[index]
+            if channels is None or record.channel in channels:
+                result.append(record)
+                if len(result) >= limit:
+                    return result
+        return result if cursor >= self._floor else None
+
+    def _load(self, rows: list, cutoff: str) -> None:
+        records = [NewsRecord(*row) for row in reversed(rows)]
+        self._records = records
+        self._keys = [(record.pub_date, record.id) for record in records]
+        self._max_id = max((record.id for record in records), default=0)
+        self._floor = (cutoff, 0)
+        if len(records) >= self.max_items:
+            # Выборка обрезана лимитом: полнота гарантирована только выше самой старой записи
+            self._floor = max(self._floor, self._keys[0])
+        logger.info(f"Индекс свежих новостей загружен: {len(records)} записей")
+
+    def _insert(self, rows: list) -> None:
+        for row in rows:
+            record = NewsRecord(*row)
+            self._max_id = max(self._max_id, record.id)
+            key = (record.pub_date, record.id)
+            if key <= self._floor:
+                continue
+            # Новости обычно новее всех записей, и вставка приходится на конец списка
+            position = bisect.bisect_right(self._keys, key)
+            self._keys.insert(position, key)
+            self._records.insert(position, record)
+
+    def _evict(self, cutoff: str) -> None:
+        floor = max(self._floor, (cutoff, 0))
+        expired = bisect.bisect_right(self._keys, floor)
+        overflow = len(self._keys) - expired - self.max_items
+        if overflow > 0:
+            expired += overflow
+            floor = max(floor, self._keys[expired - 1])
+        if expired:
+            del self._keys[:expired]
+            del self._records[:expired]
+        self._floor = floor
@@ -0,0 +1,116 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from telegram import Update
+
+from database.db import Database
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = ("administrator", "creator")
+
+
+class MemberStatusCache:
+    """Кэш статусов участников чатов (бота и пользователей) с ограниченным временем жизни.
+
+    Позволяет повторным командам проверять права без запросов get_chat_member.
+    Обновления my_chat_member и chat_member от Telegram сразу заменяют статус в кэше.
+    """
+
+    def __init__(self, ttl: float = 600, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[str, float]]" = OrderedDict()
+
+    async def get_status(self, bot, chat_id: int, user_id: int) -> str:
+        """Возвращает статус участника, обращаясь к Telegram только при промахе кэша."""
+        status = await self._get(chat_id, user_id)
+        if status is None:
+            member = await bot.get_chat_member(chat_id, user_id)
+            status = member.status
+            await self.put(chat_id, user_id, status)
+        return status
+
+    async def is_admin(self, bot, chat_id: int, user_id: int) -> bool:
+        return await self.get_status(bot, chat_id, user_id) in ADMIN_STATUSES
+
+    async def put(self, chat_id: int, user_id: int, status: str) -> None:
+        key = (chat_id, user_id)
+        self._entries[key] = (status, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, chat_id: int, user_id: Optional[int] = None) -> None:
+        """Сбрасывает статус участника или, без user_id, все статусы чата."""
+        if user_id is not None:
+            self._entries.pop((chat_id, user_id), None)
+            return
+        for key in [key for key in self._entries if key[0] == chat_id]:
+            del self._entries[key]
+
+    async def _get(self, chat_id: int, user_id: int) -> Optional[str]:
+        entry = self._entries.get((chat_id, user_id))
+        if entry is None:
+            return None
+        status, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[(chat_id, user_id)]
+            return None
+        return status
+
+    async def track_updates(self, update: Update, context) -> None:
+        """Обработчик ChatMemberHandler: обновляет кэш по изменениям участников чата."""
+        change = update.my_chat_member or update.chat_member
+        if change is None:
+            return
+        chat_id = change.chat.id
+        user_id = change.new_chat_member.user.id
+        status = change.new_chat_member.status
+        if update.my_chat_member is not None and status not in ADMIN_STATUSES:
+            # Без прав администратора бот не получает chat_member, статусы пользователей могут устареть
+            await self.invalidate(chat_id)
+        await self.put(chat_id, user_id, status)
+        logger.info(f"Статус участника {user_id} в чате {chat_id} изменен: {status}")
+
+
+class SharedMemberStatusCache(MemberStatusCache):
+    """Кэш статусов участников в таблице member_statuses, общий для процессов бота (режим webhook).
+
+    Обновление chat_member приходит только в один процесс; в локальном кэше остальных
+    процессов разжалованный администратор сохранял бы права до истечения ttl. Срок
+    жизни записей отсчитывается по системным часам, общим для процессов.
+    """
+
+    def __init__(self, db: Database, ttl: float = 600):
+        super().__init__(ttl=ttl)
+        self.db = db
+
+    async def put(self, chat_id: int, user_id: int, status: str) -> None:
+        await self.db.run(self._put_row, chat_id, user_id, status, time.time())
+
+    def _put_row(self, conn, chat_id: int, user_id: int, status: str, now: float) -> None:
+        with conn:
+            # Заодно удаляются устаревшие записи чата, чтобы таблица не росла
+            conn.execute("DELETE FROM member_statuses WHERE chat_id = ? AND expires_at < ?", (chat_id, now))
+            conn.execute(
+                "INSERT OR REPLACE INTO member_statuses (chat_id, user_id, status, expires_at) VALUES (?, ?, ?, ?)",
+                (chat_id, user_id, status, now + self.ttl)
+            )
+
+    async def invalidate(self, chat_id: int, user_id: Optional[int] = None) -> None:
+        if user_id is not None:
+            await self.db.execute(
+                "DELETE FROM member_statuses WHERE chat_id = ? AND user_id = ?", (chat_id, user_id)
+            )
+        else:
+            await self.db.execute("DELETE FROM member_statuses WHERE chat_id = ?", (chat_id,))
+
+    async def _get(self, chat_id: int, user_id: int) -> Optional[str]:
+        row = await self.db.fetchone(
+            "SELECT status FROM member_statuses WHERE chat_id = ? AND user_id = ? AND expires_at >= ?",
+            (chat_id, user_id, time.time())
+        )
+        return row[0] if row else None
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from typing import Callable, List, Sequence, Tuple
+
+from database.db import Database
+from monitoring.metrics import INFERENCE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Ограничение Telegram на длину одного сообщения
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+PROMPT_HEADER = "Суммаризируй следующие экономические новости:\n\n"
+
+
+def format_item(title: str, source: str, content: str) -> str:
+    """Форматирует одну новость для промпта."""
+    return f"Заголовок: {title}\nИсточник: {source}\nТекст: {content}\n\n"
+
+
+def max_new_tokens_for_message(reserved_chars: int, chars_per_token: float,
+                               limit: int = TELEGRAM_MESSAGE_LIMIT) -> int:
+    """Число токенов генерации, при котором сводка гарантированно помещается в одно сообщение."""
+    return max(1, int((limit - reserved_chars) / chars_per_token))
+
+
+class PromptBuilder:
+    """Собирает промпт из новостей в пределах бюджета входных токенов.
+
+    Каждая новость токенизируется один раз: обрезанный до item_token_limit текст
+    и его длина в токенах сохраняются в таблице news_tokens.
+    """
+
+    def __init__(self, db: Database, tokenizer_provider: Callable, tokenizer_name: str,
+                 input_token_budget: int = 1024, item_token_limit: int = 256):
+        self.db = db
+        self._tokenizer_provider = tokenizer_provider
+        # Кэш зависит и от токенизатора, и от лимита на новость
+        self.tokenizer_key = f"{tokenizer_name}:{item_token_limit}"
+        self.input_token_budget = input_token_budget
+        self.item_token_limit = item_token_limit
+        self._header_tokens = None
+
+    async def build(self, items: Sequence) -> Tuple[str, List]:
+        """Возвращает промпт и новости, которые в него вошли (самые свежие, по порядку).
+
+        items — строки (id, title, content, channel, ...), отсортированные от новых к старым.
+        Хотя бы одна новость попадает в промпт всегда.
+        """
+        tokenized = await self.tokenize(items)
+        if self._header_tokens is None:
+            tokenizer = await asyncio.to_thread(self._tokenizer_provider)
+            self._header_tokens = len(tokenizer.encode(PROMPT_HEADER))
+
+        prompt, used, total = PROMPT_HEADER, [], self._header_tokens
+        for item in items:
+            text, token_count = tokenized[item[0]]
+            if used and total + token_count > self.input_token_budget:
+                break
+            prompt += text
+            total += token_count
+            used.append(item)
+        logger.info(f"Промпт: {len(used)} из {len(items)} новостей, {total} токенов")
+        return prompt, used
+
+    async def tokenize(self, items: Sequence) -> dict:
+        """Возвращает {id новости: (обрезанный текст, число токенов)}, используя кэш news_tokens."""
+        ids = [item[0] for item in items]
+        rows = await self.db.fetchall(
+            f"SELECT news_id, text, token_count FROM news_tokens "
+            f"WHERE tokenizer = ? AND news_id IN ({', '.join('?' * len(ids))})",
+            (self.tokenizer_key, *ids)
+        )
+        tokenized = {row[0]: (row[1], row[2]) for row in rows}
+        missing = [item for item in items if item[0] not in tokenized]
+        if missing:
+            computed = await asyncio.to_thread(self._tokenize_items, missing)
+            await self.db.executemany(
+                "INSERT OR REPLACE INTO news_tokens (news_id, tokenizer, text, token_count) VALUES (?, ?, ?, ?)",
+                [(news_id, self.tokenizer_key, text, count) for news_id, (text, count) in computed.items()]
+            )
+            tokenized.update(computed)
+        return tokenized
+
+    def _tokenize_items(self, items: Sequence) -> dict:
+        tokenizer = self._tokenizer_provider()
+        with INFERENCE_SECONDS.labels("tokenize_items").time():
+            return self._truncate_items(tokenizer, items)
+
+    def _truncate_items(self, tokenizer, items: Sequence) -> dict:
+        result = {}
+        for news_id, title, content, source, *_ in items:
+            text = format_item(title, source, content)
+            token_ids = tokenizer.encode(text)
+            if len(token_ids) > self.item_token_limit:
+                token_ids = token_ids[:self.item_token_limit]
+                text = tokenizer.decode(token_ids, skip_special_tokens=True) + "\n\n"
+            result[news_id] = (text, len(token_ids))
+        return result
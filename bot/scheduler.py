@@ -0,0 +1,210 @@
+import logging
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from database.db import Database
+
+logger = logging.getLogger(__name__)
+
+
+class SubscriptionStore:
+    """Хранилище подписок чатов в таблице subscriptions (переживает перезапуск бота)."""
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def get(self, chat_id: int) -> Optional[dict]:
+        """Возвращает подписку чата или None."""
+        row = await self.db.fetchone(
+            "SELECT chat_id, minutes, display, last_sent FROM subscriptions WHERE chat_id = ?", (chat_id,)
+        )
+        return self._to_dict(row) if row else None
+
+    async def all(self) -> List[dict]:
+        """Возвращает все подписки."""
+        rows = await self.db.fetchall("SELECT chat_id, minutes, display, last_sent FROM subscriptions")
+        return [self._to_dict(row) for row in rows]
+
+    async def set(self, chat_id: int, minutes: int, display: str) -> None:
+        """Создает или обновляет подписку чата, сохраняя время последней отправки."""
+        await self.db.execute(
+            """
+            INSERT INTO subscriptions (chat_id, minutes, display, created_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(chat_id) DO UPDATE SET minutes = excluded.minutes, display = excluded.display
+            """,
+            (chat_id, minutes, display, datetime.now().isoformat(timespec="seconds"))
+        )
+
+    async def delete(self, chat_id: int) -> bool:
+        """Удаляет подписку чата; возвращает False, если ее не было."""
+        return await self.db.execute("DELETE FROM subscriptions WHERE chat_id = ?", (chat_id,)) > 0
+
+    async def mark_sent(self, chat_id: int, sent_at: datetime) -> None:
+        """Запоминает время последней успешной отправки."""
+        await self.db.execute(
+            "UPDATE subscriptions SET last_sent = ? WHERE chat_id = ?",
+            (sent_at.isoformat(timespec="seconds"), chat_id)
+        )
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        return {
+            "chat_id": row["chat_id"],
+            "minutes": row["minutes"],
+            "display": row["display"],
+            "last_sent": datetime.fromisoformat(row["last_sent"]) if row["last_sent"] else None,
+        }
+
+
+def job_name(chat_id: int) -> str:
+    """Имя задачи рассылки чата в JobQueue."""
+    return f"news_summary_{chat_id}"
+
+
+def slot_offset(chat_id: int, interval: float, spread: float) -> float:
+    """Детерминированное смещение чата внутри интервала, распределяющее чаты по времени."""
+    window = max(1.0, min(interval, spread))
+    # Мультипликативное хэширование равномерно раскладывает соседние chat_id
+    return (chat_id * 2654435761 % 2 ** 32) / 2 ** 32 * window
+
+
+def next_run_delay(chat_id: int, minutes: int, spread: float, anchor: float = 0, now: float = None) -> float:
+    """Секунды до ближайшего слота чата на общей временной шкале.
+
+    Слоты чата с интервалом minutes лежат в точках anchor + offset + k * interval,
+    поэтому все перезапуски бота дают одни и те же моменты отправки.
+    """
+    now = time.time() if now is None else now
+    interval = minutes * 60
+    base = anchor + slot_offset(chat_id, interval, spread)
+    return (base - now) % interval or interval
+
+
+def schedule_chat(job_queue, callback: Callable, chat_id: int, minutes: int,
+                  last_sent: Optional[datetime] = None, spread: float = 3600,
+                  anchor: float = 0, catchup_window: float = 300) -> None:
+    """Ставит (или переставляет) задачу рассылки чата на его слоты.
+
+    Если с последней отправки прошло больше интервала (бот был остановлен),
+    пропущенные запуски объединяются в одну догоняющую отправку.
+    """
+    unschedule_chat(job_queue, chat_id)
+    interval = minutes * 60
+    delay = next_run_delay(chat_id, minutes, spread, anchor)
+    job_queue.run_repeating(callback, interval=interval, first=delay, data=chat_id, name=job_name(chat_id))
+
+    if last_sent is not None and (datetime.now() - last_sent).total_seconds() >= interval:
+        catchup = slot_offset(chat_id, catchup_window, catchup_window)
+        if catchup < delay:
+            job_queue.run_once(callback, when=catchup, data=chat_id, name=job_name(chat_id))
+            logger.info(f"Догоняющая отправка для чата {chat_id} через {catchup:.0f} с")
+    logger.info(f"Следующая отправка для чата {chat_id} через {delay:.0f} с")
+
+
+def unschedule_chat(job_queue, chat_id: int) -> bool:
+    """Снимает все задачи рассылки чата; возвращает True, если они были."""
+    jobs = job_queue.get_jobs_by_name(job_name(chat_id))
+    for job in jobs:
+        job.schedule_removal()
+    return bool(jobs)
+
+
+async def restore_jobs(job_queue, store: SubscriptionStore, callback: Callable, **options) -> int:
+    """Восстанавливает задачи всех сохраненных подписок при запуске бота."""
+    subscriptions = await store.all()
+    for subscription in subscriptions:
+        schedule_chat(
+            job_queue, callback, subscription["chat_id"], subscription["minutes"],
+            last_sent=subscription["last_sent"], **options
+        )
+    logger.info(f"Восстановлено подписок: {len(subscriptions)}")
+    return len(subscriptions)
+
+
+class DatabaseSchedule:
+    """Расписание рассылок в базе для нескольких процессов бота (режим webhook).
+
+    Ведущий процесс раз в тик переносит наступившие слоты подписок в таблицу
+    delivery_jobs, а все процессы забирают оттуда задачи доставки. Задача, взятая
+    упавшим процессом, снова становится доступна после истечения claimed_until.
+    """
+
+    def __init__(self, db: Database, spread: float = 3600, anchor: float = 0,
+                 catchup_window: float = 300, max_attempts: int = 3):
+        self.db = db
+        self.spread = spread
+        self.anchor = anchor
+        self.catchup_window = catchup_window
+        self.max_attempts = max_attempts
+
+    async def schedule(self, chat_id: int, minutes: int) -> None:
+        """Назначает следующий слот отправки чата."""
+        now = time.time()
+        await self.db.execute(
+            "UPDATE subscriptions SET next_run_at = ? WHERE chat_id = ?",
+            (now + next_run_delay(chat_id, minutes, self.spread, self.anchor, now), chat_id)
+        )
+        logger.info(f"Расписание чата {chat_id} сохранено в базе: каждые {minutes} мин")
+
+    async def unschedule(self, chat_id: int) -> bool:
+        """Удаляет ожидающие задачи доставки чата; возвращает True, если они были."""
+        return await self.db.execute("DELETE FROM delivery_jobs WHERE chat_id = ?", (chat_id,)) > 0
+
+    async def tick(self) -> int:
+        """Ставит в очередь доставки все наступившие слоты; возвращает число новых задач."""
+        return await self.db.run(self._tick, time.time())
+
+    def _tick(self, conn, now: float) -> int:
+        queued = 0
+        with conn:
+            rows = conn.execute(
+                "SELECT chat_id, minutes, last_sent, next_run_at FROM subscriptions "
+                "WHERE next_run_at IS NULL OR next_run_at <= ?", (now,)
+            ).fetchall()
+            for row in rows:
+                chat_id, minutes = row["chat_id"], row["minutes"]
+                interval = minutes * 60
+                due = row["next_run_at"] is not None
+                if not due and row["last_sent"]:
+                    # Подписка без слота (создана до перехода в режим webhook): догоняющая
+                    # отправка, если с последней отправки прошло больше интервала
+                    due = now - datetime.fromisoformat(row["last_sent"]).timestamp() >= interval
+                if due:
+                    queued += conn.execute(
+                        "INSERT INTO delivery_jobs (chat_id, due_at) SELECT ?, ? "
+                        "WHERE NOT EXISTS (SELECT 1 FROM delivery_jobs WHERE chat_id = ?)",
+                        (chat_id, now, chat_id)
+                    ).rowcount
+                conn.execute(
+                    "UPDATE subscriptions SET next_run_at = ? WHERE chat_id = ?",
+                    (now + next_run_delay(chat_id, minutes, self.spread, self.anchor, now), chat_id)
+                )
+        if queued:
+            logger.info(f"В очередь доставки поставлено задач: {queued}")
+        return queued
+
+    async def claim(self, owner: str, limit: int, lease: float) -> List[tuple]:
+        """Забирает до limit наступивших задач доставки; возвращает [(id задачи, chat_id)]."""
+        return await self.db.run(self._claim, owner, limit, lease, time.time())
+
+    def _claim(self, conn, owner: str, limit: int, lease: float, now: float) -> List[tuple]:
+        with conn:
+            conn.execute("DELETE FROM delivery_jobs WHERE attempts >= ? AND claimed_until < ?",
+                         (self.max_attempts, now))
+            rows = conn.execute(
+                """
+                UPDATE delivery_jobs SET claimed_by = ?, claimed_until = ?, attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM delivery_jobs
+                    WHERE due_at <= ? AND (claimed_until IS NULL OR claimed_until < ?)
+                    ORDER BY due_at LIMIT ?
+                )
+                RETURNING id, chat_id
+                """,
+                (owner, now + lease, now, now, limit)
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    async def complete(self, job_id: int) -> None:
+        await self.db.execute("DELETE FROM delivery_jobs WHERE id = ?", (job_id,))
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Callable, Iterator
+
+from telegram.error import BadRequest, RetryAfter
+
+from delivery import DeliveryQueue, retry_after_seconds
+from inference import InferencePool
+
+logger = logging.getLogger(__name__)
+
+_CHUNK, _ERROR, _DONE = range(3)
+
+
+async def stream_in_pool(pool: InferencePool, stream: Callable[..., Iterator[str]],
+                         *args, **kwargs) -> AsyncIterator[str]:
+    """Выполняет потоковую генерацию в пуле инференса и отдает фрагменты текста в цикл событий.
+
+    Задача занимает поток пула до конца генерации, поэтому общий лимит
+    параллельных генераций соблюдается и для потоковой выдачи.
+    """
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue()
+
+    def produce() -> None:
+        try:
+            for chunk in stream(*args, **kwargs):
+                loop.call_soon_threadsafe(chunks.put_nowait, (_CHUNK, chunk))
+        except Exception as e:
+            loop.call_soon_threadsafe(chunks.put_nowait, (_ERROR, e))
+        else:
+            loop.call_soon_threadsafe(chunks.put_nowait, (_DONE, None))
+
+    future = pool.submit(produce)
+    deadline = loop.time() + pool.timeout
+    try:
+        while True:
+            kind, value = await asyncio.wait_for(chunks.get(), max(0.0, deadline - loop.time()))
+            if kind == _DONE:
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        # Если генерация еще не началась (например, по таймауту), она будет пропущена потоком
+        future.cancel()
+
+
+class ProgressiveMessage:
+    """Сообщение-заглушка, которое редактируется по мере генерации текста.
+
+    Правки отправляются не чаще одной за min_interval секунд и только если текст
+    заметно вырос, чтобы не упираться в ограничения Telegram на частоту правок.
+    Заглушка отправляется через очередь доставки, а правки ждут ее общего лимита и
+    лимита чата, поэтому потоковая выдача не вызывает 429 у рассылки по расписанию.
+    """
+
+    def __init__(self, delivery_queue: DeliveryQueue, chat_id: int, min_interval: float = 1.5,
+                 min_growth: int = 20, limit: int = 4096):
+        self.delivery_queue = delivery_queue
+        self.chat_id = chat_id
+        self.min_interval = min_interval
+        self.min_growth = min_growth
+        self.limit = limit
+        self.message = None
+        self._shown = ""
+        self._last_edit = 0.0
+
+    async def start(self, placeholder: str) -> None:
+        """Отправляет заглушку, которую затем будут заменять правками."""
+        self.message = (await self.delivery_queue.send(self.chat_id, placeholder))[0]
+        self._shown = placeholder
+        self._last_edit = time.monotonic()
+
+    async def update(self, text: str) -> None:
+        """Показывает промежуточный текст, если позволяет ограничение частоты правок."""
+        if time.monotonic() - self._last_edit < self.min_interval:
+            return
+        if len(text) - len(self._shown) < self.min_growth:
+            return
+        await self._edit(text + " ▌")
+
+    async def finish(self, text: str) -> None:
+        """Заменяет сообщение окончательным текстом."""
+        await self._edit(text, final=True)
+
+    async def _edit(self, text: str, final: bool = False) -> None:
+        text = text[:self.limit]
+        if text == self._shown:
+            return
+        while True:
+            await self.delivery_queue.acquire(self.chat_id)
+            try:
+                await self.message.edit_text(text)
+                break
+            except RetryAfter as e:
+                retry_after = retry_after_seconds(e)
+                self.delivery_queue.pause(self.chat_id, retry_after)
+                if not final:
+                    # Промежуточную правку можно пропустить, окончательную — нет
+                    self._last_edit = time.monotonic() + retry_after
+                    return
+            except BadRequest as e:
+                if "not modified" not in str(e).lower():
+                    raise
+                break
+        self._shown = text
+        self._last_edit = time.monotonic()
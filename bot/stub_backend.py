@@ -0,0 +1,75 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import Iterator, List
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\S+")
+# Текст каждой новости промпта (после обрезки токенизатором переводы строк могут пропасть)
+_TEXT_RE = re.compile(r"Текст:\s*(.*?)(?=\s*Заголовок:|\Z)", re.S)
+
+
+class StubTokenizer:
+    """Токенизатор по словам с интерфейсом encode/decode токенизатора transformers."""
+
+    eos_token = "</s>"
+    pad_token = "</s>"
+
+    def __init__(self):
+        self._ids = {}
+        self._words = []
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> List[int]:
+        with self._lock:
+            ids = []
+            for word in _WORD_RE.findall(text):
+                token_id = self._ids.get(word)
+                if token_id is None:
+                    token_id = self._ids[word] = len(self._words)
+                    self._words.append(word)
+                ids.append(token_id)
+            return ids
+
+    def decode(self, token_ids, skip_special_tokens: bool = True) -> str:
+        return " ".join(self._words[token_id] for token_id in token_ids)
+
+
+class StubBackend:
+    """Заглушка модели для нагрузочных тестов: извлекает первые предложения новостей промпта.
+
+    Не требует torch; задержка генерации имитируется паузой token_delay секунд на токен
+    (STUB_TOKEN_DELAY), чтобы нагрузка на пул инференса оставалась похожей на настоящую.
+    """
+
+    name = "stub"
+
+    def __init__(self, token_delay: float = None):
+        self.token_delay = token_delay if token_delay is not None else float(os.getenv("STUB_TOKEN_DELAY", "0.002"))
+        self.tokenizer = None
+        self.model = None
+
+    def load(self) -> None:
+        self.tokenizer = StubTokenizer()
+        logger.info("Бэкенд инференса stub загружен")
+
+    def generate(self, prompts: List[str], **params) -> List[str]:
+        summaries = [self._summarize(prompt, params.get("max_new_tokens", 200)) for prompt in prompts]
+        # Пакет генерируется за время самой длинной сводки, как при настоящей пакетной генерации
+        time.sleep(self.token_delay * max((len(summary.split()) for summary in summaries), default=0))
+        return summaries
+
+    def stream(self, prompt: str, **params) -> Iterator[str]:
+        for word in self._summarize(prompt, params.get("max_new_tokens", 200)).split():
+            time.sleep(self.token_delay)
+            yield word + " "
+
+    def _summarize(self, prompt: str, max_words: int) -> str:
+        sentences = [
+            re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+            for text in _TEXT_RE.findall(prompt)
+        ]
+        return " ".join(" ".join(sentences).split()[:max_words])
@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, Optional
+
+from database.db import Database
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryCache:
+    """Кэш готовых сводок с TTL и LRU-вытеснением, сохраняемый в таблице summaries.
+
+    Ключ строится по набору ID новостей и параметрам генерации, поэтому чаты,
+    получающие одно и то же окно новостей, используют одну генерацию.
+    Одновременные запросы одного ключа объединяются в одну генерацию.
+    """
+
+    def __init__(self, db: Database, ttl: float = 3600, max_entries: int = 256):
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()  # key -> (summary, created_at)
+        self._in_flight = {}  # key -> asyncio.Future
+
+    @staticmethod
+    def make_key(news_ids: Iterable[int], params: dict) -> str:
+        """Строит ключ кэша по множеству ID новостей и параметрам генерации."""
+        payload = json.dumps(
+            {"news_ids": sorted(set(news_ids)), "params": params},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get_or_create(self, key: str, factory: Callable[[], Awaitable[str]]) -> str:
+        """Возвращает сводку из кэша или генерирует ее через factory ровно один раз."""
+        summary = await self.get(key)
+        if summary is not None:
+            logger.info(f"Сводка {key[:12]} взята из кэша")
+            return summary
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            logger.info(f"Ожидание уже идущей генерации сводки {key[:12]}")
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            summary = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже передано вызывающему, ожидающие получат его через future
+            future.exception()
+            raise
+        else:
+            future.set_result(summary)
+            await self.put(key, summary)
+            return summary
+        finally:
+            del self._in_flight[key]
+
+    async def get(self, key: str) -> Optional[str]:
+        """Возвращает непросроченную сводку из памяти или базы данных."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = await self._load(key)
+            if entry is None:
+                return None
+            self._entries[key] = entry
+        summary, created_at = entry
+        if now - created_at > self.ttl:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        self._evict_memory()
+        try:
+            await self.db.execute("UPDATE summaries SET last_used_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка обновления кэша сводок: {e}")
+        return summary
+
+    async def put(self, key: str, summary: str) -> None:
+        """Сохраняет сводку в памяти и в таблице summaries."""
+        now = time.time()
+        self._entries[key] = (summary, now)
+        self._entries.move_to_end(key)
+        self._evict_memory()
+        try:
+            await self.db.run(self._store, key, summary, now)
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка сохранения сводки в кэш: {e}")
+
+    def _store(self, conn: sqlite3.Connection, key: str, summary: str, now: float) -> None:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                (key, summary, now, now)
+            )
+            # TTL и LRU для сохраненных записей
+            conn.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                """
+                DELETE FROM summaries WHERE key IN (
+                    SELECT key FROM summaries ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            )
+
+    async def _load(self, key: str):
+        try:
+            row = await self.db.fetchone("SELECT summary, created_at FROM summaries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка чтения кэша сводок: {e}")
+            row = None
+        return tuple(row) if row else None
+
+    def _evict_memory(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import signal
+
+from aiohttp import web
+from telegram import Bot, Update
+from telegram.ext import Application
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+async def register_webhook(token: str, base_url: str, webhook_url: str, secret_token: str = None) -> None:
+    """Регистрирует адрес webhook в Bot API (выполняется один раз до запуска процессов)."""
+    async with Bot(token, base_url=base_url) as bot:
+        await bot.set_webhook(webhook_url, secret_token=secret_token or None,
+                              allowed_updates=Update.ALL_TYPES)
+    logger.info(f"Webhook зарегистрирован: {webhook_url}")
+
+
+def create_webhook_app(application: Application, url_path: str, secret_token: str = None) -> web.Application:
+    """HTTP-приложение, передающее обновления Telegram в очередь обновлений application."""
+
+    async def handle_update(request: web.Request) -> web.Response:
+        if secret_token and request.headers.get(SECRET_HEADER) != secret_token:
+            return web.Response(status=403)
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+        await application.update_queue.put(Update.de_json(data, application.bot))
+        return web.Response()
+
+    async def handle_health(request: web.Request) -> web.Response:
+        return web.json_response({"running": application.running})
+
+    app = web.Application()
+    app.router.add_post(f"/{url_path.strip('/')}", handle_update)
+    app.router.add_get("/healthz", handle_health)
+    return app
+
+
+async def run_webhook_worker(application: Application, listen: str, port: int, url_path: str,
+                             secret_token: str = None) -> None:
+    """Запускает application и принимает webhook до сигнала остановки.
+
+    Сокет открывается с SO_REUSEPORT, поэтому несколько процессов бота слушают
+    один порт и ядро распределяет соединения между ними.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    runner = web.AppRunner(create_webhook_app(application, url_path, secret_token))
+    await runner.setup()
+    await web.TCPSite(runner, listen, port, reuse_port=True).start()
+    logger.info(f"Прием webhook на {listen}:{port}/{url_path.strip('/')}")
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+        await application.stop()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+        await application.shutdown()
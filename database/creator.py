@@ -1,8 +1,20 @@
-import sqlite3
+import hashlib
+import os
+import time
 import feedparser
-from datetime import datetime
+from datetime import datetime, timedelta
 import requests
+import asyncio
+import aiohttp
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
+from urllib.parse import urlsplit
+from xml.etree.ElementTree import ParseError
+
+from database.db import get_database
+from database.dedup import assign_cluster
+from database.rss_parser import FeedItem, parse_feed, parse_pub_date
+from monitoring.metrics import FETCH_ERRORS, FETCH_ITEMS, FETCH_SECONDS
 
 CHANNELS = [
     'multievan',
@@ -17,97 +29,273 @@ CHANNELS = [
     'bankglav'
 ]
 
+INSERT_NEWS = '''INSERT OR IGNORE INTO news
+                 (channel, title, link, content, pub_date, views)
+                 VALUES (?, ?, ?, ?, ?, ?)'''
+
+def parse_feed_body(body: bytes) -> List[FeedItem]:
+    """Разбирает тело RSS потоковым парсером, а некорректный XML — через feedparser.
+
+    В асинхронном сборе вызывается в отдельном потоке, чтобы не блокировать цикл событий.
+    """
+    try:
+        return parse_feed(body)
+    except ParseError as e:
+        print(f"Лента не разобрана потоковым парсером ({e}), разбор через feedparser")
+        return _parse_feed_fallback(body)
+
+def _parse_feed_fallback(body: bytes) -> List[FeedItem]:
+    return [
+        FeedItem(entry.get('title'), entry.get('link'), entry.get('description', ''), entry.get('published'),
+                 int(entry.get('media_statistics', {}).get('views', 0)))
+        for entry in feedparser.parse(body).entries
+    ]
+
 class MultiChannelNewsCollector:
-    def __init__(self, channels: List[str]):
+    def __init__(self, channels: List[str], max_per_host: int = 4, timeout: float = 15,
+                 retries: int = 3, backoff: float = 1.0):
         self.channels = channels
-        self.base_rss_url = "https://tg.i-c-a.su/rss/"
-        self.conn = sqlite3.connect('database/bee.db')
-        self._init_db()
-
-    def _init_db(self):
-        with self.conn:
-            self.conn.execute('''CREATE TABLE IF NOT EXISTS news(
-                id INTEGER PRIMARY KEY,
-                channel TEXT,
-                title TEXT,
-                link TEXT UNIQUE,
-                content TEXT,
-                pub_date DATETIME,
-                views INTEGER
-            )''')
-
-    def collect_all_news(self):
+        # Адрес можно переопределить, например на локальный benchmarks/fake_rss.py
+        self.base_rss_url = os.getenv("RSS_BASE_URL", "https://tg.i-c-a.su/rss/")
+        # Настройки асинхронного режима сбора
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        # Соединения из общего пула (WAL): чтения бота не ждут транзакцию загрузки.
+        # Соединение берется только на время операции с базой, а не на весь цикл сбора
+        self._db = get_database()
+        self._writer = None
+
+    def collect_all_news(self) -> dict:
+        """Собирает новые записи всех каналов и возвращает {канал: (добавлено, пропущено)}."""
+        stats = {}
         for channel in self.channels:
             try:
-                self._process_channel(channel)
-                print(f"Канал {channel} обработан успешно")
+                stats[channel] = self._process_channel(channel)
+                print(f"Канал {channel} обработан успешно: добавлено {stats[channel][0]}, пропущено {stats[channel][1]}")
             except Exception as e:
+                FETCH_ERRORS.labels(channel).inc()
                 print(f"Ошибка обработки канала {channel}: {str(e)}")
+        self._print_stats(stats)
+        return stats
+
+    async def collect_all_news_async(self):
+        """Собирает все каналы параллельно: общая сессия HTTP, разбор лент в отдельных потоках."""
+        connector = aiohttp.TCPConnector(limit_per_host=self.max_per_host)
+        host_limits = {}
+        # Запись в базу идет из одного отдельного потока, чтобы не блокировать цикл событий
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="collector-db") as self._writer:
+            async with aiohttp.ClientSession(connector=connector) as session:
+                results = await asyncio.gather(
+                    *(self._process_channel_async(session, host_limits, channel)
+                      for channel in self.channels),
+                    return_exceptions=True
+                )
+        self._writer = None
+        stats = {}
+        for channel, result in zip(self.channels, results):
+            if isinstance(result, Exception):
+                FETCH_ERRORS.labels(channel).inc()
+                print(f"Ошибка обработки канала {channel}: {str(result)}")
+            else:
+                stats[channel] = result
+                print(f"Канал {channel} обработан успешно: добавлено {result[0]}, пропущено {result[1]}")
+        self._print_stats(stats)
+        return stats
+
+    def _print_stats(self, stats: dict):
+        for channel, (inserted, skipped) in stats.items():
+            FETCH_ITEMS.labels(channel, "inserted").inc(inserted)
+            FETCH_ITEMS.labels(channel, "skipped").inc(skipped)
+        inserted = sum(result[0] for result in stats.values())
+        skipped = sum(result[1] for result in stats.values())
+        print(f"Цикл сбора завершен: добавлено {inserted}, пропущено {skipped}")
+
+    async def _process_channel_async(self, session: aiohttp.ClientSession, host_limits: dict, channel: str):
+        rss_url = f"{self.base_rss_url}{channel}?limit=100"
+        host = urlsplit(rss_url).netloc
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        state = await self._in_writer(self._load_feed_state, channel)
+        async with host_limits[host]:
+            started = time.perf_counter()
+            status, body, headers = await self._fetch_body_async(session, rss_url, self._conditional_headers(state))
+            FETCH_SECONDS.labels(channel).observe(time.perf_counter() - started)
+        body_hash = await self._in_writer(self._changed_body_hash, channel, state, status, body, headers)
+        if body_hash is None:
+            return 0, 0
+        entries = await asyncio.to_thread(parse_feed_body, body)
+        stats = await self._in_writer(self._save_entries, channel, entries)
+        await self._in_writer(self._store_feed_state, channel, headers, body_hash)
+        return stats
+
+    async def _in_writer(self, func, *args):
+        """Выполняет func(conn, *args) в потоке записи."""
+        return await asyncio.get_running_loop().run_in_executor(self._writer, self._with_connection, func, *args)
+
+    def _with_connection(self, func, *args):
+        """Выполняет func(conn, *args) на соединении, взятом из пула только на время вызова."""
+        with self._db.connection() as conn:
+            return func(conn, *args)
+
+    async def _fetch_body_async(self, session: aiohttp.ClientSession, url: str, headers: dict = None):
+        """Загружает ленту с таймаутом и повторами и возвращает (статус, тело, заголовки)."""
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.get(url, headers=headers, timeout=timeout) as response:
+                    if response.status == 304:
+                        return response.status, b"", response.headers
+                    if response.status < 500:
+                        response.raise_for_status()
+                        return response.status, await response.read(), response.headers
+                    error = aiohttp.ClientResponseError(
+                        response.request_info, response.history,
+                        status=response.status, message=response.reason
+                    )
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        raise error
 
     def _process_channel(self, channel: str):
         rss_url = f"{self.base_rss_url}{channel}?limit=100"
-        feed = self._fetch_feed(rss_url)
-        self._save_feed(channel, feed)
-
-    def _fetch_feed(self, url: str):
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        return feedparser.parse(response.content)
-
-    def _save_feed(self, channel: str, feed):
-        with self.conn:
-            for item in feed.entries:
-                try:
-                    self._save_item(channel, item)
-                except Exception as e:
-                    print(f"Ошибка сохранения элемента: {str(e)}")
-
-    def _save_item(self, channel: str, item):
-        pub_date = self._parse_datetime(item.published)
-        content = self._clean_content(item.description)
-        self.conn.execute('''INSERT OR IGNORE INTO news 
-                          (channel, title, link, content, pub_date, views)
-                          VALUES (?, ?, ?, ?, ?, ?)''',
-                        (channel, item.title, item.link, content, pub_date, self._extract_views(item)))
+        state = self._with_connection(self._load_feed_state, channel)
+        with FETCH_SECONDS.labels(channel).time():
+            response = requests.get(rss_url, headers=self._conditional_headers(state), timeout=self.timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        body_hash = self._with_connection(
+            self._changed_body_hash, channel, state, response.status_code, response.content, response.headers
+        )
+        if body_hash is None:
+            return 0, 0
+        entries = parse_feed_body(response.content)
+        stats = self._with_connection(self._save_entries, channel, entries)
+        self._with_connection(self._store_feed_state, channel, response.headers, body_hash)
+        return stats
+
+    def _load_feed_state(self, conn, channel: str):
+        row = conn.execute(
+            "SELECT etag, last_modified, body_hash FROM feed_state WHERE channel = ?", (channel,)
+        ).fetchone()
+        return row if row else (None, None, None)
+
+    def _conditional_headers(self, state) -> dict:
+        etag, last_modified, _ = state
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def _changed_body_hash(self, conn, channel: str, state, status: int, body: bytes, headers):
+        """Возвращает хэш тела ленты или None, если лента не изменилась (304 или тот же хэш)."""
+        if status == 304:
+            print(f"Канал {channel} не изменился (304)")
+            return None
+        body_hash = hashlib.sha256(body).hexdigest()
+        if body_hash == state[2]:
+            print(f"Канал {channel} не изменился (тот же хэш)")
+            # Сервер мог выдать новые валидаторы для того же тела
+            self._store_feed_state(conn, channel, headers, body_hash)
+            return None
+        return body_hash
+
+    def _store_feed_state(self, conn, channel: str, headers, body_hash: str):
+        with conn:
+            conn.execute('''INSERT OR REPLACE INTO feed_state
+                              (channel, etag, last_modified, body_hash, checked_at)
+                              VALUES (?, ?, ?, ?, ?)''',
+                            (channel, headers.get('ETag'), headers.get('Last-Modified'),
+                             body_hash, datetime.now().isoformat()))
+
+    def _save_entries(self, conn, channel: str, entries: List[FeedItem]):
+        """Сохраняет только записи новее отметки канала и возвращает (добавлено, пропущено).
+
+        Строки канала вставляются одним executemany; новые строки (id больше
+        прежнего максимума) затем относятся к кластерам почти дубликатов.
+        """
+        skipped = 0
+        rows = []
+        with conn:
+            last_link, last_pub_date = self._load_channel_state(conn, channel)
+            newest_link, newest_pub_date = last_link, last_pub_date
+            for item in entries:
+                if not (item.title and item.link and item.published):
+                    print(f"Ошибка сохранения элемента: нет заголовка, ссылки или даты ({item.link})")
+                    continue
+                pub_date = self._parse_datetime(item.published)
+                if last_pub_date is not None and (pub_date < last_pub_date or item.link == last_link):
+                    skipped += 1
+                    continue
+                rows.append((channel, item.title, item.link, self._clean_content(item.description), pub_date, item.views))
+                if newest_pub_date is None or pub_date > newest_pub_date:
+                    newest_link, newest_pub_date = item.link, pub_date
+            inserted = self._insert_rows(conn, channel, rows)
+            skipped += len(rows) - inserted
+            if newest_pub_date != last_pub_date:
+                conn.execute('''INSERT OR REPLACE INTO channel_state
+                                  (channel, last_link, last_pub_date, updated_at)
+                                  VALUES (?, ?, ?, ?)''',
+                                (channel, newest_link, newest_pub_date, datetime.now().isoformat()))
+        return inserted, skipped
+
+    def _insert_rows(self, conn, channel: str, rows: list) -> int:
+        """Вставляет строки news одним executemany и возвращает число добавленных."""
+        if not rows:
+            return 0
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM news").fetchone()[0]
+        conn.executemany(INSERT_NEWS, rows)
+        # Новости канала пишет только этот сборщик, поэтому id > max_id — ровно вставленные строки
+        new_rows = conn.execute(
+            "SELECT id, content, pub_date FROM news WHERE channel = ? AND id > ? ORDER BY id", (channel, max_id)
+        ).fetchall()
+        for news_id, content, pub_date in new_rows:
+            assign_cluster(conn, news_id, content, pub_date)
+        return len(new_rows)
+
+    def _load_channel_state(self, conn, channel: str):
+        row = conn.execute(
+            "SELECT last_link, last_pub_date FROM channel_state WHERE channel = ?", (channel,)
+        ).fetchone()
+        return row if row else (None, None)
 
     def _parse_datetime(self, date_str: str) -> str:
-        formats = ['%a, %d %b %Y %H:%M:%S %Z', '%Y-%m-%dT%H:%M:%SZ', '%a, %d %b %Y %H:%M:%S %z']
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt).isoformat()
-            except ValueError:
-                continue
-        return datetime.now().isoformat()
+        return parse_pub_date(date_str) or datetime.now().isoformat()
 
     def _clean_content(self, text: str) -> str:
         return (text.replace('<br/>', '\n').replace('<br />', '\n').replace(' ', ' ').strip())
 
-    def _extract_views(self, item) -> int:
-        if hasattr(item, 'media_statistics'):
-            return int(item.media_statistics.get('views', 0))
-        return 0
-
     def clear_news(self):
-        with self.conn:
-            self.conn.execute("DELETE FROM news")
+        with self._db.connection() as conn, conn:
+            conn.execute("DELETE FROM news")
             print("DELETE FROM news success 100%")
 
-    def close(self):
-        self.conn.close()
+    def prune_news(self, max_age_days: float) -> int:
+        """Удаляет новости старше max_age_days дней и возвращает число удаленных строк."""
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+        with self._db.connection() as conn, conn:
+            deleted = conn.execute("DELETE FROM news WHERE pub_date < ?", (cutoff,)).rowcount
+            conn.execute("DELETE FROM news_tokens WHERE news_id NOT IN (SELECT id FROM news)")
+            conn.execute("DELETE FROM news_summaries WHERE news_id NOT IN (SELECT id FROM news)")
+            conn.execute("DELETE FROM news_simhash_bands WHERE news_id NOT IN (SELECT id FROM news)")
+        print(f"Удалено устаревших новостей: {deleted}")
+        return deleted
 
 def update_db():
-    collector = MultiChannelNewsCollector(CHANNELS)
-    try:
-        collector.clear_news()
-        print("If you'd seen DELETE FROM news SUCCESS, all done carefully")
-        collector.collect_all_news()
-    finally:
-        collector.close()
-        print("Connection close")
+    return MultiChannelNewsCollector(CHANNELS).collect_all_news()
+
+async def update_db_async():
+    """Асинхронный вариант update_db: каналы загружаются параллельно."""
+    return await MultiChannelNewsCollector(CHANNELS).collect_all_news_async()
+
+def prune_db(max_age_days: float = 7) -> int:
+    """Удаляет из базы новости старше max_age_days дней."""
+    return MultiChannelNewsCollector(CHANNELS).prune_news(max_age_days)
 
 if __name__ == '__main__':
-    collector = MultiChannelNewsCollector(CHANNELS)
-    try:
-        collector.collect_all_news()
-    finally:
-        collector.close()
\ No newline at end of file
+    MultiChannelNewsCollector(CHANNELS).collect_all_news()
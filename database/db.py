@@ -0,0 +1,123 @@
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, List, Optional
+
+from database.migrations import apply_migrations
+
+# Путь можно переопределить (например, для отдельной базы в сквозных проверках)
+DB_PATH = os.getenv("DB_PATH", "database/bee.db")
+
+
+class Database:
+    """Пул соединений SQLite в режиме WAL с синхронным и асинхронным доступом.
+
+    Соединения живут все время работы процесса, поэтому SQLite переиспользует
+    подготовленные выражения из своего кэша (cached_statements). Асинхронные
+    методы выполняют запросы в отдельных потоках и не блокируют цикл событий.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, pool_size: int = 4, busy_timeout: float = 5.0,
+                 cached_statements: int = 256):
+        self.db_path = db_path
+        self.pool_size = max(1, pool_size)
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="sqlite")
+        with self.connection() as conn:
+            apply_migrations(conn)
+
+    def acquire(self) -> sqlite3.Connection:
+        """Берет соединение из пула, при необходимости открывая новое."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                return self._connect()
+        return self._idle.get()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Возвращает соединение в пул, откатывая незавершенную транзакцию."""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Контекстный менеджер синхронного доступа к соединению из пула."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    async def run(self, func: Callable, *args) -> Any:
+        """Выполняет func(conn, *args) в потоке пула и возвращает результат."""
+        def call():
+            with self.connection() as conn:
+                return func(conn, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def fetchone(self, sql: str, params: Iterable = ()) -> Optional[sqlite3.Row]:
+        return await self.run(lambda conn: conn.execute(sql, params).fetchone())
+
+    async def fetchall(self, sql: str, params: Iterable = ()) -> List[sqlite3.Row]:
+        return await self.run(lambda conn: conn.execute(sql, params).fetchall())
+
+    async def execute(self, sql: str, params: Iterable = ()) -> int:
+        """Выполняет изменяющий запрос в транзакции и возвращает число затронутых строк."""
+        def call(conn):
+            with conn:
+                return conn.execute(sql, params).rowcount
+        return await self.run(call)
+
+    async def executemany(self, sql: str, seq_of_params: Iterable) -> int:
+        def call(conn):
+            with conn:
+                return conn.executemany(sql, seq_of_params).rowcount
+        return await self.run(call)
+
+    def close(self) -> None:
+        """Закрывает свободные соединения и останавливает потоки пула."""
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        # WAL: читатели не ждут запись, запись не ждет читателей
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        return conn
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(db_path: str = DB_PATH) -> Database:
+    """Возвращает общий для процесса экземпляр Database для файла db_path."""
+    with _databases_lock:
+        if db_path not in _databases:
+            _databases[db_path] = Database(db_path)
+        return _databases[db_path]
@@ -0,0 +1,92 @@
+import hashlib
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+# SimHash 64 бита делится на 4 полосы по 16 бит: при расстоянии Хэмминга <= 3
+# хотя бы одна полоса совпадает, поэтому кандидаты ищутся точным поиском по индексу.
+SIMHASH_BITS = 64
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+MAX_DISTANCE = 3
+SHINGLE_SIZE = 3
+
+_MASK = (1 << SIMHASH_BITS) - 1
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_SHIFTS = np.arange(SIMHASH_BITS, dtype=np.uint64)
+
+CANDIDATES_QUERY = f"""
+    SELECT DISTINCT n.id, n.simhash, n.cluster_id
+    FROM news_simhash_bands AS b
+    JOIN news AS n ON n.id = b.news_id
+    WHERE ({' OR '.join(['(b.band = ? AND b.value = ?)'] * BANDS)})
+      AND n.id != ? AND n.pub_date >= ?
+"""
+
+
+def simhash(text: str) -> int:
+    """Возвращает 64-битный SimHash текста по шинглам из SHINGLE_SIZE слов."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    if not shingles:
+        return 0
+    digests = b"".join(hashlib.blake2b(shingle.encode(), digest_size=8).digest() for shingle in shingles)
+    values = np.frombuffer(digests, dtype=">u8").astype(np.uint64)
+    # Бит входит в SimHash, если он установлен больше чем в половине шинглов (вес > 0)
+    ones = ((values[:, None] >> _SHIFTS) & np.uint64(1)).sum(axis=0)
+    set_bits = 2 * ones.astype(np.int64) > len(shingles)
+    return int(np.packbits(set_bits[::-1]).view(">u8")[0])
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & _MASK).count("1")
+
+
+def bands(value: int) -> list:
+    """Разбивает SimHash на BANDS значений полос по BAND_BITS бит."""
+    band_mask = (1 << BAND_BITS) - 1
+    return [(value >> (band * BAND_BITS)) & band_mask for band in range(BANDS)]
+
+
+def to_signed(value: int) -> int:
+    """SQLite хранит только знаковые 64-битные целые."""
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def assign_cluster(conn: sqlite3.Connection, news_id: int, content: str, pub_date: str,
+                   window_days: float = 3) -> Optional[int]:
+    """Вычисляет SimHash новости и относит ее к кластеру почти дубликатов.
+
+    Кластер — id первой новости группы; новости без похожих соседей образуют свой кластер.
+    Поиск кандидатов ограничен окном window_days до даты публикации и идет по индексу
+    полос, так что стоимость вставки не зависит от размера базы. Возвращает id кластера.
+    """
+    value = simhash(content or "")
+    if not value:
+        return None
+    band_values = bands(value)
+    since = (datetime.fromisoformat(pub_date) - timedelta(days=window_days)).isoformat()
+    params = [param for band, band_value in enumerate(band_values) for param in (band, band_value)]
+    cluster_id = news_id
+    best_distance = MAX_DISTANCE + 1
+    for candidate_id, candidate_hash, candidate_cluster in conn.execute(
+            CANDIDATES_QUERY, (*params, news_id, since)):
+        if candidate_hash is None:
+            continue
+        distance = hamming_distance(value, candidate_hash)
+        if distance < best_distance:
+            best_distance = distance
+            cluster_id = candidate_cluster or candidate_id
+    conn.execute("UPDATE news SET simhash = ?, cluster_id = ? WHERE id = ?",
+                 (to_signed(value), cluster_id, news_id))
+    conn.executemany(
+        "INSERT OR IGNORE INTO news_simhash_bands (band, value, news_id) VALUES (?, ?, ?)",
+        [(band, band_value, news_id) for band, band_value in enumerate(band_values)]
+    )
+    return cluster_id
@@ -0,0 +1,192 @@
+import sqlite3
+
+# Миграции схемы bee.db: (версия, описание, SQL-выражения).
+# Текущая версия хранится в PRAGMA user_version; новые миграции добавляются в конец списка.
+MIGRATIONS = [
+    (1, "базовые таблицы", [
+        '''CREATE TABLE IF NOT EXISTS news(
+            id INTEGER PRIMARY KEY,
+            channel TEXT,
+            title TEXT,
+            link TEXT UNIQUE,
+            content TEXT,
+            pub_date DATETIME,
+            views INTEGER
+        )''',
+        '''CREATE TABLE IF NOT EXISTS processed_news (
+            news_id INTEGER PRIMARY KEY,
+            processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+        '''CREATE TABLE IF NOT EXISTS channel_state(
+            channel TEXT PRIMARY KEY,
+            last_link TEXT,
+            last_pub_date DATETIME,
+            updated_at DATETIME
+        )''',
+        '''CREATE TABLE IF NOT EXISTS feed_state(
+            channel TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            body_hash TEXT,
+            checked_at DATETIME
+        )''',
+        '''CREATE TABLE IF NOT EXISTS summaries (
+            key TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used_at REAL NOT NULL
+        )''',
+    ]),
+    (2, "индексы для выборки свежих новостей", [
+        "CREATE INDEX IF NOT EXISTS idx_news_pub_date ON news(pub_date)",
+        "CREATE INDEX IF NOT EXISTS idx_news_channel_pub_date ON news(channel, pub_date)",
+        "ANALYZE",
+    ]),
+    (3, "курсоры доставки по чатам", [
+        '''CREATE TABLE IF NOT EXISTS delivery_cursors (
+            chat_id INTEGER PRIMARY KEY,
+            last_delivered_pub_date DATETIME NOT NULL,
+            last_news_id INTEGER NOT NULL,
+            updated_at DATETIME
+        )''',
+    ]),
+    (4, "подписки чатов", [
+        '''CREATE TABLE IF NOT EXISTS subscriptions (
+            chat_id INTEGER PRIMARY KEY,
+            minutes INTEGER NOT NULL,
+            display TEXT NOT NULL,
+            last_sent DATETIME,
+            created_at DATETIME
+        )''',
+    ]),
+    (5, "кэш токенизации новостей", [
+        '''CREATE TABLE IF NOT EXISTS news_tokens (
+            news_id INTEGER NOT NULL,
+            tokenizer TEXT NOT NULL,
+            text TEXT NOT NULL,
+            token_count INTEGER NOT NULL,
+            PRIMARY KEY (news_id, tokenizer)
+        )''',
+    ]),
+    (6, "краткие сводки отдельных новостей", [
+        '''CREATE TABLE IF NOT EXISTS news_summaries (
+            news_id INTEGER PRIMARY KEY,
+            summary TEXT NOT NULL,
+            created_at DATETIME
+        )''',
+    ]),
+    (7, "кластеры почти дубликатов новостей (SimHash)", [
+        "ALTER TABLE news ADD COLUMN simhash INTEGER",
+        "ALTER TABLE news ADD COLUMN cluster_id INTEGER",
+        '''CREATE TABLE IF NOT EXISTS news_simhash_bands (
+            band INTEGER NOT NULL,
+            value INTEGER NOT NULL,
+            news_id INTEGER NOT NULL,
+            PRIMARY KEY (band, value, news_id)
+        ) WITHOUT ROWID''',
+    ]),
+    (8, "общее состояние нескольких процессов бота (режим webhook)", [
+        "ALTER TABLE subscriptions ADD COLUMN next_run_at REAL",
+        '''CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )''',
+        '''CREATE TABLE IF NOT EXISTS delivery_jobs (
+            id INTEGER PRIMARY KEY,
+            chat_id INTEGER NOT NULL,
+            due_at REAL NOT NULL,
+            claimed_by TEXT,
+            claimed_until REAL,
+            attempts INTEGER NOT NULL DEFAULT 0
+        )''',
+        "CREATE INDEX IF NOT EXISTS idx_delivery_jobs_due_at ON delivery_jobs(due_at)",
+        "CREATE INDEX IF NOT EXISTS idx_delivery_jobs_chat_id ON delivery_jobs(chat_id)",
+        '''CREATE TABLE IF NOT EXISTS input_states (
+            chat_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            updated_at DATETIME,
+            PRIMARY KEY (chat_id, user_id)
+        )''',
+    ]),
+    (9, "полнотекстовый индекс новостей и фильтры сводок чатов", [
+        # Внешнее содержимое: индекс хранит только термы, текст читается из news по rowid
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+            title, content, content='news', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )''',
+        '''CREATE TRIGGER IF NOT EXISTS news_fts_insert AFTER INSERT ON news BEGIN
+            INSERT INTO news_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS news_fts_delete AFTER DELETE ON news BEGIN
+            INSERT INTO news_fts (news_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS news_fts_update AFTER UPDATE OF title, content ON news BEGIN
+            INSERT INTO news_fts (news_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO news_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+        END''',
+        "INSERT INTO news_fts (news_fts) VALUES ('rebuild')",
+        '''CREATE TABLE IF NOT EXISTS chat_filters (
+            chat_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (chat_id, kind, value)
+        ) WITHOUT ROWID''',
+    ]),
+    (10, "общий кэш статусов участников чатов (режим webhook)", [
+        '''CREATE TABLE IF NOT EXISTS member_statuses (
+            chat_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (chat_id, user_id)
+        ) WITHOUT ROWID''',
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """Применяет недостающие миграции и возвращает итоговую версию схемы.
+
+    Каждая миграция идет в своей транзакции BEGIN IMMEDIATE вместе с записью
+    user_version: DDL и новая версия фиксируются или откатываются вместе, а
+    процессы, стартующие одновременно, применяют миграцию по очереди — версия
+    перечитывается уже под блокировкой записи.
+    """
+    isolation_level = conn.isolation_level
+    # Без неявных транзакций модуля sqlite3: границы задаются явно
+    conn.isolation_level = None
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, description, statements in MIGRATIONS:
+            if target <= version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if target <= version:
+                    conn.execute("COMMIT")
+                    continue
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {target}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            print(f"Миграция схемы {target} применена: {description}")
+            version = target
+        return version
+    finally:
+        conn.isolation_level = isolation_level
+
+
+def migrate(db_path: str = "database/bee.db") -> int:
+    """Открывает базу по пути db_path и применяет к ней миграции."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return apply_migrations(conn)
+    finally:
+        conn.close()
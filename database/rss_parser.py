@@ -0,0 +1,73 @@
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+MEDIA_STATISTICS = "{http://search.yahoo.com/mrss/}statistics"
+# Форматы pubDate в порядке проверки; успешный формат переносится в начало списка
+DATE_FORMATS = ['%a, %d %b %Y %H:%M:%S %Z', '%Y-%m-%dT%H:%M:%SZ', '%a, %d %b %Y %H:%M:%S %z']
+_formats = list(DATE_FORMATS)
+
+
+class FeedItem(NamedTuple):
+    """Запись ленты с полями, которые сохраняет сборщик (имена как у записей feedparser)."""
+    title: Optional[str]
+    link: Optional[str]
+    description: str
+    published: Optional[str]
+    views: int
+
+
+def _feed_item(element: ET.Element) -> FeedItem:
+    statistics = element.find(f".//{MEDIA_STATISTICS}")
+    views = statistics.get("views", 0) if statistics is not None else 0
+    return FeedItem(
+        title=_text(element, "title"),
+        link=_text(element, "link"),
+        description=element.findtext("description") or "",
+        published=_text(element, "pubDate"),
+        views=int(views),
+    )
+
+
+def _text(element: ET.Element, tag: str) -> Optional[str]:
+    text = element.findtext(tag)
+    return text.strip() if text is not None else None
+
+
+def parse_feed(body: bytes) -> List[FeedItem]:
+    """Разбирает RSS 2.0 в формате tg.i-c-a.su.
+
+    Записи собираются по событию закрывающего </item>, элементы очищаются сразу
+    после разбора. В отличие от feedparser, описание не проходит очистку HTML:
+    в базу оно попадает как есть и дальше идет только в промпты модели.
+    Некорректный XML вызывает xml.etree.ElementTree.ParseError.
+    """
+    parser = ET.XMLPullParser(events=("end",))
+    parser.feed(body)
+    parser.close()
+    items = []
+    for _, element in parser.read_events():
+        if element.tag == "item":
+            items.append(_feed_item(element))
+            element.clear()
+    return items
+
+
+@lru_cache(maxsize=4096)
+def parse_pub_date(value: str) -> Optional[str]:
+    """Дата публикации в ISO 8601 или None, если ни один формат не подошел.
+
+    Результаты кэшируются: при каждом опросе лента повторяет до сотни уже виденных
+    дат. Первым пробуется формат, сработавший последним, — в ленте он обычно один.
+    """
+    for fmt in _formats:
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt is not _formats[0]:
+            _formats.remove(fmt)
+            _formats.insert(0, fmt)
+        return parsed.isoformat()
+    return None
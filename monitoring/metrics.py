@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+logger = logging.getLogger(__name__)
+
+# Загрузка новостей
+FETCH_SECONDS = Histogram(
+    "news_fetch_seconds", "Загрузка и разбор ленты канала", ["channel"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+FETCH_ITEMS = Counter("news_items_total", "Записи лент по результату сохранения", ["channel", "result"])
+FETCH_ERRORS = Counter("news_fetch_errors_total", "Ошибки обработки канала", ["channel"])
+
+# База данных
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds", "Время запросов к базе на пути доставки", ["query"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+NEWS_INDEX_LOOKUPS = Counter(
+    "news_index_lookups_total", "Выборки свежих новостей из индекса в памяти: hit — без запроса к базе", ["result"]
+)
+NEWS_INDEX_SIZE = Gauge("news_index_records", "Записей в индексе свежих новостей в памяти")
+
+# Инференс
+INFERENCE_SECONDS = Histogram(
+    "inference_seconds", "Время этапов инференса", ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+GENERATED_TOKENS = Counter("inference_generated_tokens_total", "Сгенерированные токены")
+TOKENS_PER_SECOND = Gauge("inference_tokens_per_second", "Скорость генерации последнего вызова, токенов в секунду")
+
+# Доставка
+DELIVERY_STAGE_SECONDS = Histogram(
+    "delivery_stage_seconds", "Время этапов подготовки и отправки сводки", ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+SUMMARY_PATH = Counter(
+    "summary_path_total", "Способ подготовки сводки: item_summaries, beam, greedy, extractive или stream", ["path"]
+)
+SUMMARY_FALLBACKS = Counter(
+    "summary_fallbacks_total", "Переходы на сводку без модели из-за сбоя генерации", ["reason"]
+)
+SEND_SECONDS = Histogram(
+    "telegram_send_seconds", "Задержка запроса sendMessage",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+SEND_ERRORS = Counter("telegram_send_errors_total", "Ошибки отправки сообщений", ["error"])
+
+# Цикл событий
+LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds", "Задержка цикла событий относительно запланированного пробуждения",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+
+
+def start_metrics_server(port: int, addr: str = "127.0.0.1") -> None:
+    """Запускает HTTP-сервер метрик в отдельном потоке (GET /metrics)."""
+    start_http_server(port, addr=addr)
+    logger.info(f"Метрики доступны по адресу http://{addr}:{port}/metrics")
+
+
+async def monitor_event_loop(interval: float = 0.5) -> None:
+    """Измеряет, насколько позже запланированного просыпается цикл событий."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - started - interval))
+
+
+def instrument_encoder(model) -> None:
+    """Измеряет время прохода энкодера модели PyTorch через хуки модуля."""
+    encoder = model.get_encoder()
+    # Генерации из разных потоков пула идут параллельно, время начала у каждого потока свое
+    started = threading.local()
+
+    def before(module, args):
+        started.time = time.perf_counter()
+
+    def after(module, args, output):
+        INFERENCE_SECONDS.labels("encode").observe(time.perf_counter() - started.time)
+
+    encoder.register_forward_pre_hook(before)
+    encoder.register_forward_hook(after)
@@ -1,12 +1,17 @@
-from transformers import GPT2Tokenizer, T5ForConditionalGeneration
+import os
+import sys
 import torch
 import sqlite3
 from datetime import datetime, timedelta
 
-tokenizer = GPT2Tokenizer.from_pretrained('RussianNLP/FRED-T5-Summarizer', eos_token='</s>')
-model = T5ForConditionalGeneration.from_pretrained('RussianNLP/FRED-T5-Summarizer')
-device = 'cpu'
-model.to(device)
+# Модель загружается через бэкенд бота: повторные запуски читают копию в safetensors
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bot'))
+from backends import TorchBackend
+
+backend = TorchBackend()
+backend.load()
+tokenizer, model = backend.tokenizer, backend.model
+device = backend.device
 
 db_path = "database/bee.db"
 try: